@@ -0,0 +1,131 @@
+import argparse
+import os
+
+import numpy as np
+
+import prediction_table
+from flat_forest import FlatForest, flatten_forest
+from feature_schema import FEATURE_NAMES, INPUT_RANGES
+from stress_model import MODEL_PATH, load_model
+from calibration import CLASS_SEVERITY, stress_scores
+
+ATTRIBUTIONS_PATH = "student_stress_attributions.npy"
+
+# Grid inputs re-explained on load to catch a grid left over from another model
+CHECK_ROWS = 32
+
+
+def as_flat_forest(model):
+    return model if isinstance(model, FlatForest) else FlatForest(**flatten_forest(model))
+
+
+def baseline(forest):
+    # The forest's average prediction before any split, which every explanation starts from
+    return forest.value[forest.roots].mean(axis=0)
+
+
+def contributions(forest, X):
+    # Tree-path attribution: every split moves the prediction from the parent's class
+    # distribution to the child's, and that change is credited to the split feature.
+    # Returns the forest-average bias (n_classes,) and contributions (n_samples, n_features, n_classes);
+    # bias + contributions.sum(axis=1) equals predict_proba.
+    X = np.asarray(X, dtype=np.float32)
+    n_trees = len(forest.roots)
+    nodes = np.repeat(forest.roots[np.newaxis, :], X.shape[0], axis=0)
+    rows = np.arange(X.shape[0])[:, np.newaxis]
+    result = np.zeros((X.shape[0], X.shape[1], forest.value.shape[1]))
+    for _ in range(forest.max_depth):
+        feature = forest.feature[nodes]
+        go_left = X[rows, feature] <= forest.threshold[nodes]
+        children = np.where(go_left, forest.left[nodes], forest.right[nodes])
+        # Leaves point at themselves, so finished paths contribute zero
+        delta = forest.value[children] - forest.value[nodes]
+        slots = (rows * X.shape[1] + feature).ravel()
+        for k in range(delta.shape[2]):
+            sums = np.bincount(slots, weights=delta[..., k].ravel(), minlength=X.shape[0] * X.shape[1])
+            result[:, :, k] += sums.reshape(X.shape[0], X.shape[1])
+        nodes = children
+    return baseline(forest), result / n_trees
+
+
+def build_attributions(model, chunk_size=4096, trees=None):
+    # `trees` (a slice) restricts the average to those trees
+    forest = as_flat_forest(model)
+    if trees is not None:
+        forest = FlatForest(forest.feature, forest.threshold, forest.left, forest.right, forest.value, forest.roots[trees], forest.classes_, forest.max_depth)
+    axes = [np.arange(low, high + 1) for _, low, high in INPUT_RANGES]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(axes))
+    table = np.empty((len(grid), len(FEATURE_NAMES), forest.value.shape[1]), dtype=np.float32)
+    for start in range(0, len(grid), chunk_size):
+        _, table[start : start + chunk_size] = contributions(forest, grid[start : start + chunk_size])
+    return table.reshape(prediction_table.GRID_SHAPE + table.shape[1:])
+
+
+def update_attributions(attributions, old_model, model, added, dropped, chunk_size=4096):
+    # Contributions are a per-tree average, so after an incremental update only the `dropped` oldest trees
+    # of the old model and the `added` newest trees of the new one are walked, not the whole forest
+    n_old, n_new = len(as_flat_forest(old_model).roots), len(as_flat_forest(model).roots)
+    total = np.asarray(attributions, dtype=np.float64) * n_old
+    if dropped:
+        total -= build_attributions(old_model, chunk_size, slice(0, dropped)) * dropped
+    if added:
+        total += build_attributions(model, chunk_size, slice(n_new - added, n_new)) * added
+    return (total / n_new).astype(np.float32)
+
+
+def save_attributions(attributions, path=ATTRIBUTIONS_PATH):
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, attributions)
+    os.replace(tmp_path, path)
+
+
+def load_attributions(path=ATTRIBUTIONS_PATH):
+    return np.load(path, mmap_mode="r")
+
+
+def lookup(attributions, features):
+    return np.array(attributions[tuple(int(value) - offset for value, offset in zip(features, prediction_table.GRID_OFFSETS))])
+
+
+def lookup_batch(attributions, features):
+    index = tuple((np.asarray(features, dtype=np.intp) - prediction_table.GRID_OFFSETS).T)
+    return np.array(attributions[index])
+
+
+def explain(forest, attributions, features):
+    # Per-feature contributions (n_features, n_classes) for one input, from the precomputed grid when possible
+    if attributions is not None and prediction_table.in_grid(features):
+        return lookup(attributions, features)
+    return contributions(forest, np.asarray(features, dtype=np.float64).reshape(1, -1))[1][0]
+
+
+def stress_contributions(feature_contributions, bias=None, calibrator=None, severity=CLASS_SEVERITY, steps=16, step=1e-3):
+    # How many points of the 0-100 stress score each feature adds (positive) or removes (negative).
+    # With a calibrator these are points of the calibrated score the gauge shows: each feature's change to the
+    # class probabilities is weighed by the score's average slope along the way from `bias` to the prediction
+    # (integrated gradients), then scaled so the points add up exactly to the score minus the baseline's.
+    if calibrator is None or bias is None:
+        return feature_contributions @ severity * 50.0
+    feature_contributions = np.asarray(feature_contributions, dtype=np.float64)
+    proba = bias + feature_contributions.sum(axis=0)
+    path = bias + ((np.arange(steps) + 0.5) / steps)[:, np.newaxis] * (proba - bias)
+    ahead = stress_scores(path[:, np.newaxis, :] + step * feature_contributions, calibrator, severity)
+    behind = stress_scores(path[:, np.newaxis, :] - step * feature_contributions, calibrator, severity)
+    points = ((ahead - behind) / (2 * step)).mean(axis=0)
+    total, estimate = float(stress_scores(proba, calibrator, severity) - stress_scores(bias, calibrator, severity)), float(points.sum())
+    return points * (total / estimate) if abs(estimate) > 1e-9 else points
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute per-feature attributions over the full input grid.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=ATTRIBUTIONS_PATH)
+    args = parser.parse_args()
+
+    attributions = build_attributions(load_model(args.model))
+    save_attributions(attributions, args.output)
+    print(f"Wrote attributions for {attributions[..., 0, 0].size} inputs ({attributions.nbytes / 1024 ** 2:.1f} MiB) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from calibration import CALIBRATION_PATH, column_severity, labels_and_scores, load_calibrator
+from feature_schema import FEATURE_NAMES, FeatureValidationError, encode_columns
+from stress_model import MODEL_PATH, load_classifier
+
+
+def read_chunks(path, chunk_size):
+    # Column batches: CSV is read as text so the input columns are echoed back unchanged;
+    # Parquet and Feather files are read as Arrow record batches (needs pyarrow)
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        yield from pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+    elif path.endswith((".arrow", ".feather")):
+        import pyarrow.feather as feather
+
+        yield from feather.read_table(path, memory_map=True).to_batches(max_chunksize=chunk_size)
+    else:
+        yield from pd.read_csv(sys.stdin if path == "-" else path, dtype=str, keep_default_na=False, chunksize=chunk_size)
+
+
+def score_stream(model, le, chunks, outfile, chunk_size, calibrator=None):
+    class_names = le.inverse_transform(model.classes_)
+    severity = column_severity(model, le)
+    # One feature buffer for the whole run; each chunk is encoded straight into it
+    buffer = np.empty((chunk_size, len(FEATURE_NAMES)))
+
+    total = 0
+    for chunk in chunks:
+        try:
+            features = encode_columns(chunk, buffer)
+        except FeatureValidationError as exc:
+            raise FeatureValidationError(exc.message, exc.feature, None if exc.row is None else total + exc.row) from None
+        # One vectorized forest evaluation per chunk
+        proba = model.predict_proba(features)
+        columns, scores = labels_and_scores(proba, calibrator, severity)
+        frame = chunk if isinstance(chunk, pd.DataFrame) else chunk.to_pandas()
+        frame = frame.assign(
+            PredictedStress=class_names.take(columns),
+            StressScore=np.char.mod("%.1f", scores),
+            **{f"P_{name}": proba[:, index] for index, name in enumerate(class_names)},
+        )
+        frame.to_csv(outfile, header=total == 0, index=False, float_format="%.4f")
+        outfile.flush()
+        total += len(frame)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a student survey file in fixed-size chunks.")
+    parser.add_argument(
+        "input",
+        help="CSV, Parquet or Feather file with Age, SleepHours, StudyHours, ScreenTime, Exercise, SocialSupport columns ('-' for CSV on stdin)",
+    )
+    parser.add_argument("-o", "--output", default="-", help="Where to write the scored CSV ('-' for stdout)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--calibration", default=CALIBRATION_PATH, help="Calibration map for StressScore, used if present")
+    args = parser.parse_args()
+
+    # Decoded with the artifact's own label encoder
+    model, le = load_classifier(args.model)
+
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        total = score_stream(model, le, read_chunks(args.input, args.chunk_size), outfile, args.chunk_size, load_calibrator(args.calibration))
+    except FeatureValidationError as exc:
+        sys.exit(f"Invalid input: {exc}")
+    finally:
+        if outfile is not sys.stdout:
+            outfile.close()
+    print(f"Scored {total} rows", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.io as pio
+
+import figures
+
+SCORES = figures.lifestyle_scores(7, 4, 6, 2, 1)
+CONTRIBUTIONS = [-0.4, 6.2, 3.1, 8.5, -2.7, -5.0]
+
+
+def render(fig):
+    # What st.plotly_chart does with a Figure before sending it to the browser
+    return pio.to_json(fig.to_dict(), validate=False)
+
+
+CASES = {
+    "gauge: build + serialize": lambda: figures.build_gauge("Medium", 57).to_json(),
+    "gauge: prebuilt": lambda: figures.gauge_json("Medium", 57.3),
+    "radar: build + serialize": lambda: figures.build_radar(SCORES).to_json(),
+    "radar: template swap": lambda: figures.radar_json(SCORES),
+    "drivers: build + serialize": lambda: figures.build_drivers(CONTRIBUTIONS).to_json(),
+    "drivers: template swap": lambda: figures.drivers_json(CONTRIBUTIONS),
+    "render from cached JSON": lambda: render(figures.figure_from_json(figures.radar_json(SCORES))),
+}
+
+
+def run(number=200):
+    # Warm up once so lazy Plotly imports and the per-process caches are not counted
+    for case in CASES.values():
+        case()
+    return {name: min(timeit.repeat(case, number=number, repeat=5)) / number * 1000 for name, case in CASES.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure gauge, radar and drivers figure construction cost.")
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.number)
+    for name, ms in results.items():
+        print(f"{name:<28} {ms:8.3f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"figures_ms": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from calibration import stress_scores
+from history import HistoryStore
+from feature_schema import INPUT_RANGES
+from stress_model import CLASS_NAMES
+
+
+def run(rows, users, queries=200, seed=0):
+    rng = np.random.default_rng(seed)
+    features = np.column_stack([rng.integers(low, high + 1, rows) for _, low, high in INPUT_RANGES])
+    proba = rng.dirichlet(np.ones(len(CLASS_NAMES)), rows)
+    labels = np.array(CLASS_NAMES)[proba.argmax(axis=1)]
+    scores = stress_scores(proba)
+    user_ids = [f"user-{index}" for index in rng.integers(0, users, rows)]
+    created_at = time.time() - rows + np.arange(rows, dtype=np.float64)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Queue everything up front so the write rate is measured, not the drop policy
+        store = HistoryStore(os.path.join(directory, "history.sqlite3"), max_pending=rows)
+        start = time.perf_counter()
+        for index in range(rows):
+            store.record(user_ids[index], features[index], labels[index], proba[index], scores[index], created_at[index])
+        enqueued = time.perf_counter() - start
+        store.flush()
+        written = time.perf_counter() - start
+
+        samples = []
+        for user in rng.integers(0, users, queries):
+            start = time.perf_counter()
+            store.trend(f"user-{user}")
+            samples.append((time.perf_counter() - start) * 1000)
+        return {
+            "rows": rows,
+            "users": users,
+            "record_us_per_call": enqueued / rows * 1e6,
+            "rows_per_second_written": rows / written,
+            "trend_query_ms_median": statistics.median(samples),
+            "trend_query_ms_max": max(samples),
+            "dropped": store.dropped,
+            "file_mib": os.path.getsize(store.path) / 1024 ** 2,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure prediction history write throughput and trend query latency.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.users)
+    for name, value in results.items():
+        print(f"{name:<26} {value:>14.3f}" if isinstance(value, float) else f"{name:<26} {value:>14}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"history": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
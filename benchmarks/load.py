@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState, WidgetStates
+from streamlit.testing.v1.element_tree import parse_tree_from_messages
+from websockets.asyncio.client import connect
+
+APP_PATH = os.path.join(ROOT, "student_mental_health.py")
+DATA_PATH = os.path.join(ROOT, "student_mental_health.csv")
+
+# The survey form: widget kind and label on the page, and the CSV column that supplies its value
+INPUTS = (
+    ("number_input", "age", "Age"),
+    ("radio", "social support", "SocialSupport"),
+    ("slider", "Sleep Hours", "SleepHours"),
+    ("slider", "Study Hours", "StudyHours"),
+    ("slider", "Screen Time", "ScreenTime"),
+    ("slider", "Exercise", "Exercise"),
+)
+SUBMIT_LABEL = "Analyze My Mental Health"
+
+
+def find_widget(node, kind, label):
+    if getattr(node, "type", None) == kind and label.lower() in getattr(node, "label", "").lower():
+        return node
+    for child in getattr(node, "children", {}).values():
+        found = find_widget(child, kind, label)
+        if found is not None:
+            return found
+    return None
+
+
+def widget_state(widget, value):
+    # What the browser sends for a widget: the test element builds it, except for radios, whose helper
+    # needs a live session; a radio sends its option label
+    if widget.type == "radio":
+        return WidgetState(id=widget.id, string_value=str(value))
+    return widget.set_value(value)._widget_state
+
+
+class SimulatedUser:
+    # One browser tab speaking Streamlit's websocket protocol: load the page, then fill in the form from a
+    # sampled survey row and submit it, over and over. Slider moves inside the form stay in the browser,
+    # so each analysis is exactly one BackMsg and the ForwardMsgs it produces.
+
+    def __init__(self, url, rows, seed):
+        self.url = url
+        self.rows = rows
+        self.rng = np.random.default_rng(seed)
+        self.page_script_hash = ""
+
+    async def rerun(self, websocket, widget_states=None):
+        msg = BackMsg()
+        msg.rerun_script.CopyFrom(ClientState(widget_states=widget_states, page_script_hash=self.page_script_hash))
+        await websocket.send(msg.SerializeToString())
+        received = []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await websocket.recv())
+            received.append(forward)
+            if forward.HasField("new_session"):
+                self.page_script_hash = forward.new_session.page_script_hash
+            if forward.HasField("script_finished") and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return received
+
+    async def run(self, deadline, think_seconds, stats):
+        async with connect(self.url, subprotocols=["streamlit"], max_size=None) as websocket:
+            start = time.perf_counter()
+            messages = await self.rerun(websocket)
+            stats["page_load_ms"].append((time.perf_counter() - start) * 1000)
+            tree = parse_tree_from_messages([msg for msg in messages if msg.HasField("delta")])
+            widgets = [find_widget(tree, kind, label) for kind, label, _ in INPUTS]
+            submit = find_widget(tree, "button", SUBMIT_LABEL)
+            if submit is None or None in widgets:
+                raise RuntimeError("The page no longer has the expected survey form")
+
+            while time.monotonic() < deadline:
+                row = self.rows[self.rng.integers(len(self.rows))]
+                states = WidgetStates()
+                for widget, value in zip(widgets, row):
+                    states.widgets.append(widget_state(widget, value))
+                states.widgets.append(submit.click()._widget_state)
+
+                start = time.perf_counter()
+                messages = await self.rerun(websocket, states)
+                elapsed = (time.perf_counter() - start) * 1000
+                exceptions = [msg.delta.new_element.exception for msg in messages if msg.HasField("delta") and msg.delta.new_element.HasField("exception")]
+                if exceptions:
+                    stats["errors"] += 1
+                    stats.setdefault("first_error", f"{exceptions[0].type}: {exceptions[0].message}")
+                else:
+                    stats["analyze_ms"].append(elapsed)
+                    stats["bytes"] += sum(msg.ByteSize() for msg in messages)
+                if think_seconds:
+                    await asyncio.sleep(self.rng.exponential(think_seconds))
+
+
+def load_rows(path, limit=None):
+    frame = pd.read_csv(path, nrows=limit)
+    return [
+        tuple(value if column == "SocialSupport" else int(value) for column, value in zip([c for _, _, c in INPUTS], values))
+        for values in frame[[column for _, _, column in INPUTS]].itertuples(index=False)
+    ]
+
+
+def process_cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def process_rss_kib(pid):
+    with open(f"/proc/{pid}/status") as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line)
+    return int(fields["VmRSS"].split()[0]), int(fields["VmHWM"].split()[0])
+
+
+def start_servers(count, base_port, state_dir):
+    # Real `streamlit run` workers; history, drift and shadow output go to a scratch directory, not the repository
+    env = dict(os.environ, PREDICTION_HISTORY_PATH=os.path.join(state_dir, "history.sqlite3"), DRIFT_STATUS_PATH=os.path.join(state_dir, "drift_status.json"),
+               SHADOW_STATUS_PATH=os.path.join(state_dir, "shadow_status.json"))
+    servers = []
+    for port in range(base_port, base_port + count):
+        command = [
+            sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless=true", f"--server.port={port}",
+            "--server.fileWatcherType=none", "--browser.gatherUsageStats=false",
+        ]
+        with open(os.path.join(state_dir, f"server-{port}.log"), "w") as log:
+            servers.append((port, subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)))
+    for port, process in servers:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Streamlit server on port {port} did not start; see {state_dir}/server-{port}.log")
+                time.sleep(0.2)
+    return servers
+
+
+async def run_level(servers, rows, sessions, duration, think_seconds, seed):
+    stats = {"page_load_ms": [], "analyze_ms": [], "errors": 0, "bytes": 0}
+    cpu_before = {port: process_cpu_seconds(process.pid) for port, process in servers}
+    start = time.perf_counter()
+    deadline = time.monotonic() + duration
+    users = [
+        SimulatedUser(f"ws://127.0.0.1:{servers[index % len(servers)][0]}/_stcore/stream", rows, seed + index)
+        for index in range(sessions)
+    ]
+    await asyncio.gather(*(user.run(deadline, think_seconds, stats) for user in users))
+    wall = time.perf_counter() - start
+
+    latencies = np.array(stats["analyze_ms"]) if stats["analyze_ms"] else np.zeros(1)
+    workers = []
+    for port, process in servers:
+        rss, peak = process_rss_kib(process.pid)
+        workers.append({
+            "port": port,
+            "cpu_percent": (process_cpu_seconds(process.pid) - cpu_before[port]) / wall * 100,
+            "rss_mib": rss / 1024,
+            "peak_rss_mib": peak / 1024,
+        })
+    return {
+        "sessions": sessions,
+        "analyses": len(stats["analyze_ms"]),
+        "errors": stats["errors"],
+        "first_error": stats.get("first_error"),
+        "throughput_per_s": len(stats["analyze_ms"]) / wall,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "page_load_p50_ms": float(np.median(stats["page_load_ms"])),
+        "kib_per_analysis": stats["bytes"] / 1024 / max(len(stats["analyze_ms"]), 1),
+        "workers": workers,
+    }
+
+
+def run(concurrency, servers=1, duration=20.0, think_seconds=0.0, base_port=8601, warmup=3.0, seed=0):
+    rows = load_rows(DATA_PATH)
+    with tempfile.TemporaryDirectory() as state_dir:
+        processes = start_servers(servers, base_port, state_dir)
+        try:
+            # One session per worker first, so model loading and cold caches are not counted
+            asyncio.run(run_level(processes, rows, servers, warmup, 0.0, seed))
+            return [asyncio.run(run_level(processes, rows, sessions, duration, think_seconds, seed)) for sessions in concurrency]
+        finally:
+            for _, process in processes:
+                process.terminate()
+            for _, process in processes:
+                process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated sessions against local Streamlit workers over the websocket protocol.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32], help="Simultaneous sessions per level")
+    parser.add_argument("--servers", type=int, default=1, help="Streamlit worker processes; sessions are spread across them")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a result and the next submit (0 = closed loop)")
+    parser.add_argument("--port", type=int, default=8601, help="First worker port")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if any level's p95 analysis latency exceeds this")
+    parser.add_argument("--min-throughput", type=float, help="Fail if the highest level completes fewer analyses per second")
+    args = parser.parse_args()
+
+    results = run(args.concurrency, args.servers, args.duration, args.think_ms / 1000, args.port)
+    print(f"{'sessions':>8}{'analyses':>10}{'errors':>8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'load ms':>9}{'KiB/req':>9}  workers (CPU %, RSS MiB)")
+    for level in results:
+        workers = ", ".join(f"{worker['cpu_percent']:.0f}% {worker['rss_mib']:.0f}" for worker in level["workers"])
+        print(
+            f"{level['sessions']:>8}{level['analyses']:>10}{level['errors']:>8}{level['throughput_per_s']:>8.1f}{level['p50_ms']:>9.1f}"
+            f"{level['p95_ms']:>9.1f}{level['p99_ms']:>9.1f}{level['page_load_p50_ms']:>9.1f}{level['kib_per_analysis']:>9.1f}  {workers}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"load": results}, f, indent=2)
+
+    failures = [f"{level['sessions']} sessions: {level['errors']} failed analyses, first: {level['first_error']}" for level in results if level["errors"]]
+    if args.max_p95_ms is not None:
+        failures += [
+            f"{level['sessions']} sessions: p95 {level['p95_ms']:.1f} ms > {args.max_p95_ms} ms" for level in results if level["p95_ms"] > args.max_p95_ms
+        ]
+    if args.min_throughput is not None and results[-1]["throughput_per_s"] < args.min_throughput:
+        failures.append(f"{results[-1]['sessions']} sessions: {results[-1]['throughput_per_s']:.1f} analyses/s < {args.min_throughput}")
+    if failures:
+        sys.exit("Capacity check failed:\n  " + "\n  ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
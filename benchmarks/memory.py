@@ -0,0 +1,86 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# How a worker process holds the model
+MODES = {
+    "pickle": lambda: __import__("stress_model").load_model(),
+    "flat-copy": lambda: __import__("stress_model").load_model(os.path.join(ROOT, "student_stress_model.forest"), use_mmap=False),
+    "flat-mmap": lambda: __import__("stress_model").load_model(os.path.join(ROOT, "student_stress_model.forest"), use_mmap=True),
+}
+
+
+def memory_kib():
+    # RSS counts shared pages in full; PSS divides them between the processes mapping them
+    with open("/proc/self/smaps_rollup") as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line)
+    return int(fields["Rss"].split()[0]), int(fields["Pss"].split()[0])
+
+
+def worker(mode, ready, done, results):
+    os.chdir(ROOT)
+    import numpy as np
+
+    from feature_schema import INPUT_RANGES
+
+    model = MODES[mode]()
+    # Touch every node so the whole model is resident
+    axes = [np.arange(low, high + 1) for _, low, high in INPUT_RANGES]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(axes))
+    model.predict(grid[::97])
+    ready.wait()
+    results.put(memory_kib())
+    done.wait()
+
+
+def run(workers, modes):
+    context = multiprocessing.get_context("spawn")
+    report = {}
+    for mode in modes:
+        ready = context.Barrier(workers + 1)
+        done = context.Event()
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(mode, ready, done, results)) for _ in range(workers)]
+        for process in processes:
+            process.start()
+        # Measure while every worker is alive, so shared pages are split between them
+        ready.wait()
+        samples = [results.get() for _ in processes]
+        done.set()
+        for process in processes:
+            process.join()
+        report[mode] = {
+            "workers": workers,
+            "rss_kib_per_worker": sum(rss for rss, _ in samples) // workers,
+            "pss_kib_per_worker": sum(pss for _, pss in samples) // workers,
+            "pss_kib_total": sum(pss for _, pss in samples),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker memory for each way of holding the model.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    report = run(args.workers, args.modes)
+    print(f"{'mode':<10} {'RSS/worker':>12} {'PSS/worker':>12} {'PSS total':>12}")
+    for mode, stats in report.items():
+        print(
+            f"{mode:<10} {stats['rss_kib_per_worker'] / 1024:>9.1f} MiB {stats['pss_kib_per_worker'] / 1024:>9.1f} MiB"
+            f" {stats['pss_kib_total'] / 1024:>9.1f} MiB"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"memory": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
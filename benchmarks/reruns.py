@@ -0,0 +1,193 @@
+import argparse
+import functools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+from streamlit.testing.v1 import AppTest
+import streamlit.testing.v1.local_script_runner as local_script_runner
+
+# A typical visit: adjust a few habits, analyze, then explore what-ifs. Widgets are found by label so the
+# same steps drive older versions of the page too; a step whose widget that version lacks is reported as n/a.
+INTERACTIONS = (
+    ("move Sleep slider", "slider", "Sleep Hours", 5),
+    ("move Screen Time slider", "slider", "Screen Time", 9),
+    ("move Exercise slider", "slider", "Exercise", 4),
+    ("click Analyze", "button", "Analyze My Mental Health", None),
+    ("open What-If Explorer", "toggle", "changing your habits", True),
+    ("change What-If rows", "selectbox", "Rows", "Study Hours"),
+    ("paste history code", "text_input", "History code", "bench-history-code"),
+)
+
+
+class Session:
+    # Plays one browser session against a page script through AppTest, sending what the frontend would:
+    # every widget's current value, nothing for changes inside an unsubmitted form, and fragment-scoped
+    # reruns for widgets drawn by a fragment. ForwardMsgs are counted as the runtime enqueues them for the websocket.
+
+    def __init__(self, script, timeout=120):
+        self.app = AppTest.from_file(script, default_timeout=timeout)
+        self.widgets = {}
+        self.fragment_of = {}
+        self.messages = []
+
+    def _on_enqueue(self, msg):
+        self.messages.append(msg)
+        if msg.HasField("delta") and msg.delta.HasField("new_element"):
+            element = msg.delta.new_element
+            widget = getattr(element, element.WhichOneof("type"))
+            if getattr(widget, "id", ""):
+                self.fragment_of[widget.id] = msg.delta.fragment_id
+
+    def _run(self, widget_states=None, fragment_id=None):
+        self.messages = []
+        original = local_script_runner.RerunData
+        if fragment_id is not None:
+            # What the browser sends for a widget inside a fragment (AppTest itself always reruns the whole script)
+            local_script_runner.RerunData = functools.partial(original, fragment_id_queue=[fragment_id])
+        ForwardMsgQueue.on_before_enqueue_msg(self._on_enqueue)
+        start = time.perf_counter()
+        try:
+            self.app._run(widget_states)
+        finally:
+            elapsed = time.perf_counter() - start
+            ForwardMsgQueue.on_before_enqueue_msg(None)
+            local_script_runner.RerunData = original
+        if self.app.exception:
+            raise RuntimeError(self.app.exception[0].value)
+
+        # Fragments that ran redraw their widgets; everything else keeps its last drawn state, as in the browser
+        ran = {msg.delta.fragment_id for msg in self.messages if msg.HasField("delta")}
+        full_run = "" in ran
+        self.widgets = {
+            widget_id: widget for widget_id, widget in self.widgets.items() if not full_run and self.fragment_of.get(widget_id) not in ran
+        }
+        for node in self.app._tree.children.values():
+            self._collect(node)
+        return {
+            "scope": "full" if full_run else f"{len(ran)} fragment" + "s" * (len(ran) > 1),
+            "messages": len(self.messages),
+            "bytes": sum(msg.ByteSize() for msg in self.messages),
+            "ms": elapsed * 1000,
+        }
+
+    def _collect(self, node):
+        if getattr(node, "id", None) and hasattr(node, "_widget_state"):
+            self.widgets[node.id] = node
+        for child in getattr(node, "children", {}).values():
+            self._collect(child)
+
+    def find(self, kind, label):
+        return next((widget for widget in self.widgets.values() if widget.type == kind and label in widget.label), None)
+
+    def load(self):
+        return self._run()
+
+    def interact(self, kind, label, value):
+        widget = self.find(kind, label)
+        if widget is None:
+            return None
+        if kind == "button":
+            widget.click()
+        else:
+            widget.set_value(value)
+        if getattr(widget, "form_id", "") and not getattr(widget.proto, "is_form_submitter", False):
+            # Held by the browser until the form is submitted
+            return {"scope": "none", "messages": 0, "bytes": 0, "ms": 0.0}
+        states = WidgetStates()
+        for other in self.widgets.values():
+            state = other._widget_state
+            # Buttons only fire on the interaction that clicked them
+            if state.WhichOneof("value") == "trigger_value" and other is not widget:
+                continue
+            states.widgets.append(state)
+        return self._run(states, self.fragment_of.get(widget.id) or None)
+
+
+def play(script, timeout=120):
+    session = Session(script, timeout)
+    steps = [("page load", session.load())]
+    for name, kind, label, value in INTERACTIONS:
+        steps.append((name, session.interact(kind, label, value)))
+    return steps
+
+
+def run(script, repeat=3, timeout=120):
+    # The first session warms the model, prediction and figure caches; timings are medians over the rest
+    warnings.filterwarnings("ignore")
+    # The page imports the modules that sit next to it
+    sys.path.insert(0, os.path.dirname(script))
+    play(script, timeout)
+    sessions = [play(script, timeout) for _ in range(repeat)]
+    results = {}
+    for index, (name, first) in enumerate(sessions[0]):
+        results[name] = None if first is None else dict(first, ms=statistics.median(session[index][1]["ms"] for session in sessions))
+    return results
+
+
+def run_at_ref(ref, repeat=3):
+    # The page as of a git revision, in a scratch checkout and a fresh interpreter so it imports that revision's
+    # modules and serves its tracked model instead of this tree's artifacts
+    with tempfile.TemporaryDirectory() as scratch:
+        tree, output = os.path.join(scratch, "tree"), os.path.join(scratch, "reruns.json")
+        subprocess.run(["git", "-C", ROOT, "worktree", "add", "--quiet", "--detach", tree, ref], check=True)
+        try:
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--script", os.path.join(tree, "student_mental_health.py"), "--repeat", str(repeat), "--json", output],
+                cwd=tree,
+                stdout=subprocess.DEVNULL,
+                check=True,
+            )
+        finally:
+            subprocess.run(["git", "-C", ROOT, "worktree", "remove", "--force", tree], check=True)
+        with open(output) as f:
+            return json.load(f)["reruns"]["current"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure websocket bytes and server time per interaction on the main page.")
+    parser.add_argument("--script", default=os.path.join(ROOT, "student_mental_health.py"))
+    parser.add_argument("--compare", metavar="SCRIPT", help="Another version of the page to measure the same way, e.g. from git show")
+    parser.add_argument("--compare-ref", metavar="REF", help="Measure the page as of this git revision, with that revision's modules and model")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.compare_ref:
+        scripts = {"before": f"{args.compare_ref}:student_mental_health.py", "after": args.script}
+        results = {"before": run_at_ref(args.compare_ref, args.repeat), "after": run(os.path.abspath(args.script), args.repeat)}
+    else:
+        scripts = {"before": args.compare, "after": args.script} if args.compare else {"current": args.script}
+        results = {name: run(os.path.abspath(path), args.repeat) for name, path in scripts.items()}
+
+    for name, steps in results.items():
+        print(f"\n{name}: {scripts[name]}")
+        print(f"{'interaction':<26}{'rerun':>13}{'msgs':>6}{'KiB':>9}{'ms':>9}")
+        for step, result in steps.items():
+            if result is None:
+                print(f"{step:<26}{'n/a':>13}")
+                continue
+            print(f"{step:<26}{result['scope']:>13}{result['messages']:>6}{result['bytes'] / 1024:>9.1f}{result['ms']:>9.1f}")
+        # Steps the page has no widget for count as nothing, so compare totals with the n/a rows in mind
+        after_load = [result for step, result in steps.items() if step != "page load" and result is not None]
+        print(
+            f"{'interactions total':<26}{'':>13}{sum(r['messages'] for r in after_load):>6}"
+            f"{sum(r['bytes'] for r in after_load) / 1024:>9.1f}{sum(r['ms'] for r in after_load):>9.1f}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"reruns": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import warnings
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+import flat_forest
+import prediction_table
+import stress_model
+from feature_schema import encode_columns
+
+DATA_PATH = os.path.join(ROOT, "student_mental_health.csv")
+APP_PATH = os.path.join(ROOT, "student_mental_health.py")
+RESULTS_PATH = "benchmark_results.json"
+MAX_CALLS = 500
+
+
+def per_call_ms(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def synthetic_features(rows, seed=0):
+    # Uniform over the widget bounds, same layout as the real survey
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.integers(low, high + 1, rows) for _, low, high in stress_model.INPUT_RANGES]).astype(np.float64)
+
+
+def load_predictors():
+    predictors = {"sklearn": stress_model.load_model(os.path.join(ROOT, stress_model.MODEL_PATH))}
+    forest_path = os.path.join(ROOT, flat_forest.FOREST_PATH)
+    if os.path.exists(forest_path):
+        predictors["flat_forest"] = flat_forest.FlatForest.load(forest_path)
+    return predictors
+
+
+def bench_single_row(predictors, table, row):
+    results = {name: per_call_ms(lambda: model.predict(row), 50) for name, model in predictors.items()}
+    if table is not None:
+        results["table_lookup"] = per_call_ms(lambda: prediction_table.lookup(table, row[0]), 2000)
+    return results
+
+
+def bench_throughput(predictors, datasets, batch_sizes):
+    results = {}
+    for name, model in predictors.items():
+        results[name] = {}
+        for dataset, features in datasets.items():
+            for batch_size in batch_sizes:
+                if batch_size > len(features):
+                    continue
+                # Cap the number of calls so small batches on huge datasets finish in reasonable time
+                rows = min(len(features), batch_size * MAX_CALLS)
+                start = time.perf_counter()
+                for offset in range(0, rows, batch_size):
+                    model.predict_proba(features[offset : offset + batch_size])
+                elapsed = time.perf_counter() - start
+                results[name][f"{dataset}/batch={batch_size}"] = {
+                    "rows": rows,
+                    "seconds": elapsed,
+                    "rows_per_second": rows / elapsed,
+                }
+    return results
+
+
+def bench_inverse_transform(le, rows):
+    encoded = np.random.default_rng(0).integers(0, len(stress_model.CLASS_NAMES), rows)
+    return {
+        "single_ms": per_call_ms(lambda: le.inverse_transform([encoded[0]]), 2000),
+        f"batch_{rows}_ms": per_call_ms(lambda: le.inverse_transform(encoded), 20),
+    }
+
+
+def bench_figures():
+    from benchmarks import figures
+
+    return figures.run(number=50)
+
+
+def bench_script_rerun(runs):
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng(0)
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    first_run = time.perf_counter() - start
+
+    def timed(action):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            action()
+            samples.append((time.perf_counter() - start) * 1000)
+        return {"median_ms": float(np.median(samples)), "max_ms": float(np.max(samples))}
+
+    # Interactions go through a session that reruns only what the browser would ask for (form, fragments)
+    from benchmarks import reruns
+
+    session = reruns.Session(APP_PATH)
+    session.load()
+    return {
+        "first_run_ms": first_run * 1000,
+        "rerun": timed(app.run),
+        "slider_move": timed(lambda: session.interact("slider", "Sleep Hours", int(rng.integers(1, 11)))),
+        "analyze_click": timed(lambda: session.interact("button", "Analyze My Mental Health", None)),
+    }
+
+
+def flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{key}", value
+
+
+def compare(baseline, results):
+    # Ratio of new to old for every shared numeric metric; >1 is slower for *_ms/seconds, faster for rows_per_second
+    old = dict(flatten({k: v for k, v in baseline.items() if k != "meta"}))
+    for key, value in flatten({k: v for k, v in results.items() if k != "meta"}):
+        if old.get(key):
+            print(f"{key:<70} {old[key]:>12.4g} -> {value:>12.4g}  x{value / old[key]:.2f}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the prediction and rendering path and write JSON results.")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--synthetic-rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 1024, 16384])
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--skip-app", action="store_true", help="Skip the Streamlit script rerun benchmark")
+    parser.add_argument("--startup", action="store_true", help="Also run the cold-start benchmark")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    predictors = load_predictors()
+    try:
+        table = prediction_table.load_table(os.path.join(ROOT, prediction_table.TABLE_PATH))
+    except FileNotFoundError:
+        table = None
+
+    survey = encode_columns(pd.read_csv(DATA_PATH))
+    datasets = {"survey": survey}
+    datasets.update({f"synthetic_{rows}": synthetic_features(rows) for rows in args.synthetic_rows})
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "single_row_predict_ms": bench_single_row(predictors, table, survey[:1]),
+        "batch_throughput": bench_throughput(predictors, datasets, args.batch_sizes),
+        "inverse_transform": bench_inverse_transform(stress_model.create_label_encoder(), 100_000),
+        "figures_ms": bench_figures(),
+    }
+    if not args.skip_app:
+        results["script_rerun"] = bench_script_rerun(args.reruns)
+    if args.startup:
+        from benchmarks import startup
+
+        results["startup_ms"] = startup.run()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps({key: value for key, value in results.items() if key != "batch_throughput"}, indent=2))
+    print(f"Wrote {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet runs in a fresh interpreter so it pays the full cold-start cost
+STEPS = {
+    "import streamlit": "import streamlit",
+    "import app modules": "import flat_forest, latency, prediction_table, stress_model",
+    "import plotly + first figure": "import plotly.graph_objects as go; go.Figure(go.Indicator(value=50))",
+    "import sklearn": "import sklearn.ensemble",
+    "load pickled model": "import stress_model; stress_model.load_model()",
+    "load flat forest": "import flat_forest; flat_forest.FlatForest.load()",
+    "load prediction table": "import prediction_table; prediction_table.load_table()",
+    "first page render": (
+        "from streamlit.testing.v1 import AppTest; "
+        "AppTest.from_file('student_mental_health.py', default_timeout=120).run()"
+    ),
+}
+
+TIMER = """
+import time, warnings
+warnings.filterwarnings("ignore")
+_start = time.perf_counter()
+{code}
+print(time.perf_counter() - _start)
+"""
+
+
+def measure(code, repeat):
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)], cwd=ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return None
+        timings.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+    return statistics.median(timings)
+
+
+def run(repeat=3):
+    return {name: measure(code, repeat) for name, code in STEPS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import and model-load cost.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    for name, ms in results.items():
+        print(f"{name:<30} {'unavailable' if ms is None else f'{ms:9.1f} ms'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"startup_ms": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
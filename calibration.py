@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from stress_model import CLASS_NAMES, MODEL_PATH, load_bundle
+
+CALIBRATION_PATH = "student_stress_calibration.json"
+
+SEVERITY = {"Low": 0, "Medium": 1, "High": 2}
+SEVERITY_NAMES = ("Low", "Medium", "High")
+# Severity per probability column for a model whose classes are encoded in CLASS_NAMES order; loaded versions
+# carry their own, from column_severity
+CLASS_SEVERITY = np.array([SEVERITY[name] for name in CLASS_NAMES])
+
+# Forest probabilities are often exactly 0; keep their logs finite
+EPSILON = 1e-4
+
+
+class Calibrator:
+    # Multinomial logistic map from the forest's log-probabilities to calibrated ones (matrix scaling);
+    # a handful of numbers, applied with NumPy alone
+
+    def __init__(self, coef, intercept, metadata=None):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.metadata = metadata or {}
+
+    def transform(self, proba):
+        logits = np.log(np.clip(proba, EPSILON, 1.0)) @ self.coef.T + self.intercept
+        logits -= logits.max(axis=-1, keepdims=True)
+        weights = np.exp(logits)
+        return weights / weights.sum(axis=-1, keepdims=True)
+
+    def to_dict(self):
+        return {"coef": self.coef.tolist(), "intercept": self.intercept.tolist(), "metadata": self.metadata}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["coef"], data["intercept"], data.get("metadata"))
+
+
+def column_severity(model, label_encoder):
+    # Severity of each predict_proba column, decoded with the model's own label encoder
+    return np.array([SEVERITY[str(name)] for name in label_encoder.inverse_transform(model.classes_)])
+
+
+def stress_scores(proba, calibrator=None, severity=CLASS_SEVERITY):
+    # Expected severity on a 0-100 scale: 0 = certainly Low, 100 = certainly High
+    if calibrator is not None:
+        proba = calibrator.transform(proba)
+    return proba @ severity * 50.0
+
+
+def labels_and_scores(proba, calibrator=None, severity=CLASS_SEVERITY):
+    # Column index of the predicted class and the 0-100 score, both from the calibrated distribution,
+    # so the label shown never disagrees with the score next to it
+    if calibrator is not None:
+        proba = calibrator.transform(proba)
+    return np.argmax(proba, axis=-1), stress_scores(proba, severity=severity)
+
+
+def out_of_fold_proba(model, X, y, folds=5, seed=42):
+    # Probabilities for each row from a forest that never saw it; in-sample forest output is overconfident
+    from sklearn.base import clone
+    from sklearn.model_selection import StratifiedKFold, cross_val_predict
+
+    return cross_val_predict(clone(model), X, y, cv=StratifiedKFold(folds, shuffle=True, random_state=seed), method="predict_proba")
+
+
+def fit_calibrator(proba, y, metadata=None):
+    from sklearn.linear_model import LogisticRegression
+
+    regression = LogisticRegression(max_iter=1000)
+    regression.fit(np.log(np.clip(proba, EPSILON, 1.0)), y)
+    return Calibrator(regression.coef_, regression.intercept_, metadata)
+
+
+def log_loss(proba, y):
+    return float(-np.mean(np.log(np.clip(proba[np.arange(len(y)), y], EPSILON, 1.0))))
+
+
+def calibration_error(proba, y, bins=10):
+    # Expected calibration error of the top class: gap between confidence and accuracy, weighted by bin size
+    confidence = proba.max(axis=1)
+    correct = proba.argmax(axis=1) == y
+    index = np.minimum((confidence * bins).astype(np.intp), bins - 1)
+    counts = np.bincount(index, minlength=bins)
+    gaps = np.abs(np.bincount(index, weights=confidence, minlength=bins) - np.bincount(index, weights=correct, minlength=bins))
+    return float(gaps.sum() / max(counts.sum(), 1))
+
+
+def out_of_fold_calibrated(proba, y, folds=5, seed=42):
+    # Each row calibrated by a map fitted without it, for an honest before/after comparison
+    from sklearn.model_selection import StratifiedKFold
+
+    calibrated = np.empty_like(proba)
+    for fit_rows, held_out in StratifiedKFold(folds, shuffle=True, random_state=seed).split(proba, y):
+        calibrated[held_out] = fit_calibrator(proba[fit_rows], y[fit_rows]).transform(proba[held_out])
+    return calibrated
+
+
+def fit_for_model(model, data_path, folds=5, seed=42):
+    from train import load_dataset
+
+    X, y, _, _ = load_dataset(data_path)
+    raw = out_of_fold_proba(model, X, y, folds, seed)
+    calibrator = fit_calibrator(raw, y, {"data_path": data_path, "rows": int(len(y)), "folds": folds})
+    calibrated = out_of_fold_calibrated(raw, y, folds, seed)
+    calibrator.metadata.update(
+        log_loss_raw=log_loss(raw, y),
+        log_loss_calibrated=log_loss(calibrated, y),
+        ece_raw=calibration_error(raw, y),
+        ece_calibrated=calibration_error(calibrated, y),
+    )
+    return calibrator
+
+
+def save_calibrator(calibrator, path=CALIBRATION_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(calibrator.to_dict(), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_calibrator(path=CALIBRATION_PATH):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return Calibrator.from_dict(json.load(f))
+
+
+def main():
+    from train import DATA_PATH
+
+    parser = argparse.ArgumentParser(description="Fit a probability calibration map for the stress model from the survey CSV.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--output", default=CALIBRATION_PATH)
+    args = parser.parse_args()
+
+    calibrator = fit_for_model(load_bundle(args.model)["model"], args.data, args.folds)
+    save_calibrator(calibrator, args.output)
+    metadata = calibrator.metadata
+    print(f"Wrote {args.output}")
+    print(f"  log loss: {metadata['log_loss_raw']:.3f} -> {metadata['log_loss_calibrated']:.3f} (out-of-fold)")
+    print(f"  calibration error: {metadata['ece_raw']:.3f} -> {metadata['ece_calibrated']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from feature_schema import feature_by_name
+
+DATA_PATH = "student_mental_health.csv"
+# The analytics page only offers the CSVs in this directory (COHORT_DATA_DIR), never arbitrary server paths
+DATA_DIR = "."
+TARGET = "StressLevel"
+
+# Each column is cut into a few bins; a value below the first edge falls into the first bin
+Dimension = namedtuple("Dimension", ["name", "column", "edges", "labels"])
+
+DIMENSIONS = (
+    Dimension("Age", "Age", (19, 21, 23, 25), ("≤18", "19–20", "21–22", "23–24", "25+")),
+    Dimension("Sleep", "SleepHours", (5, 7, 9), ("<5 h", "5–6 h", "7–8 h", "9+ h")),
+    Dimension("Study", "StudyHours", (3, 5, 7), ("≤2 h", "3–4 h", "5–6 h", "7+ h")),
+    Dimension("Screen time", "ScreenTime", (4, 7, 10), ("≤3 h", "4–6 h", "7–9 h", "10+ h")),
+    Dimension("Exercise", "Exercise", (1, 3, 5), ("None", "1–2×/week", "3–4×/week", "5+×/week")),
+    Dimension("Social support", "SocialSupport", (1,), ("No", "Yes")),
+)
+DIMENSION_NAMES = tuple(dimension.name for dimension in DIMENSIONS)
+
+# Charts read left to right from least to most stressed
+STRESS_ORDER = ("Low", "Medium", "High")
+
+CUBE_SHAPE = tuple(len(dimension.labels) for dimension in DIMENSIONS) + (len(STRESS_ORDER),)
+
+
+def encode_chunk(frame):
+    # Bin codes for every dimension plus the stress code, as small integer columns;
+    # rows with an unrecognized social support answer get code -1 and are dropped with the rest
+    answers = frame["SocialSupport"].astype(str).str.strip().str.lower()
+    support = answers.map(feature_by_name("SocialSupport").categories).fillna(-1).to_numpy(np.float64)
+    columns = []
+    for dimension in DIMENSIONS:
+        values = support if dimension.column == "SocialSupport" else frame[dimension.column].to_numpy(np.float64)
+        columns.append(np.digitize(values, dimension.edges).astype(np.uint8))
+    # Unknown stress labels get code -1 and are dropped by the caller
+    stress = pd.Categorical(frame[TARGET].astype(str).str.strip(), categories=STRESS_ORDER).codes
+    codes = np.column_stack(columns + [stress.astype(np.int16)])
+    codes[support < 0, -1] = -1
+    return codes
+
+
+def build_cube(path, chunk_size=1_000_000):
+    # One pass over the file, counting students in every combination of bins and stress level.
+    # The counts are tiny next to the raw table, and every later filter or group-by reads only them.
+    cube = np.zeros(int(np.prod(CUBE_SHAPE)), dtype=np.int64)
+    usecols = [dimension.column for dimension in DIMENSIONS] + [TARGET]
+    for frame in pd.read_csv(path, usecols=usecols, chunksize=chunk_size):
+        frame = frame.dropna()
+        codes = encode_chunk(frame)
+        codes = codes[codes[:, -1] >= 0]
+        cube += np.bincount(np.ravel_multi_index(tuple(codes.T), CUBE_SHAPE), minlength=cube.size)
+    return cube.reshape(CUBE_SHAPE)
+
+
+def survey_files(root=DATA_DIR):
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if name.endswith(".csv") and os.path.isfile(os.path.join(root, name)))
+
+
+def aggregate(cube, by, filters=None):
+    # Stress counts (n_bins, n_levels) for one dimension, keeping only the selected bins of the others
+    filters = filters or {}
+    selected = cube
+    for axis, dimension in enumerate(DIMENSIONS):
+        if dimension.name in filters:
+            selected = selected.take(sorted(filters[dimension.name]), axis=axis)
+    axis = DIMENSION_NAMES.index(by)
+    others = tuple(other for other in range(len(DIMENSIONS)) if other != axis)
+    counts = selected.sum(axis=others)
+    if by in filters:
+        # Keep unselected groups on the chart as empty bars so bins stay aligned with their labels
+        full = np.zeros((len(DIMENSIONS[axis].labels), len(STRESS_ORDER)), dtype=counts.dtype)
+        full[sorted(filters[by])] = counts
+        counts = full
+    return counts
+
+
+def shares(counts):
+    # Row-normalized stress distribution; empty groups stay at zero
+    totals = counts.sum(axis=-1, keepdims=True)
+    return np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the stress distribution of a survey export by cohort.")
+    parser.add_argument("paths", nargs="*", default=[DATA_PATH])
+    parser.add_argument("--by", choices=DIMENSION_NAMES, default="Age")
+    args = parser.parse_args()
+
+    cube = sum(build_cube(path) for path in args.paths)
+    counts = aggregate(cube, args.by)
+    print(f"{args.by:<16}{'Students':>10}" + "".join(f"{name:>10}" for name in STRESS_ORDER))
+    for label, row, share in zip(DIMENSIONS[DIMENSION_NAMES.index(args.by)].labels, counts, shares(counts)):
+        print(f"{label:<16}{row.sum():>10}" + "".join(f"{value:>10.1%}" for value in share))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from feature_schema import SCHEMA
+from stress_model import CLASS_NAMES
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = "student_mental_health.csv"
+BASELINE_PATH = "student_stress_drift_baseline.json"
+STATUS_PATH = "drift_status.json"
+TARGET = "StressLevel"
+
+# Every input is a whole number in a small range, so one counter per possible value is an exact histogram;
+# the prediction mix is one more block of counters. All of them live side by side in one row of counts.
+BLOCKS = tuple((feature.name, feature.low, feature.high - feature.low + 1) for feature in SCHEMA) + (("Prediction", 0, len(CLASS_NAMES)),)
+OFFSETS = np.cumsum([0] + [size for _, _, size in BLOCKS])
+N_BINS = int(OFFSETS[-1])
+FEATURE_OFFSETS = OFFSETS[: len(SCHEMA)] - np.array([feature.low for feature in SCHEMA])
+
+# Population stability index bands in common use: below 0.1 stable, 0.1-0.25 moderate shift, above that major
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# Two-sample Kolmogorov-Smirnov critical coefficient at alpha = 0.01
+KS_COEFFICIENT = 1.63
+# Empty bins would make PSI infinite; treat them as this share instead
+MIN_SHARE = 1e-4
+
+
+def psi(expected, actual):
+    expected = np.maximum(expected / max(expected.sum(), 1), MIN_SHARE)
+    actual = np.maximum(actual / max(actual.sum(), 1), MIN_SHARE)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks(expected, actual):
+    # Largest gap between the two cumulative distributions over the ordered bins
+    return float(np.abs(np.cumsum(expected) / max(expected.sum(), 1) - np.cumsum(actual) / max(actual.sum(), 1)).max())
+
+
+def ks_critical(n_expected, n_actual):
+    return KS_COEFFICIENT * np.sqrt((n_expected + n_actual) / (n_expected * n_actual))
+
+
+def build_baseline(data_path=DATA_PATH, chunk_size=100_000):
+    # Training-set counts in the monitor's layout: input values from the features, the mix from the labels
+    import pandas as pd
+
+    from feature_schema import encode_columns
+
+    counts = np.zeros(N_BINS, dtype=np.int64)
+    for chunk in pd.read_csv(data_path, chunksize=chunk_size):
+        X = encode_columns(chunk).astype(np.intp)
+        counts += np.bincount((X + FEATURE_OFFSETS).ravel(), minlength=N_BINS)
+        labels = chunk[TARGET].map({name: code for code, name in enumerate(CLASS_NAMES)}).dropna().to_numpy(np.intp)
+        counts += np.bincount(labels + OFFSETS[len(SCHEMA)], minlength=N_BINS)
+    return {"data_path": data_path, "rows": int(counts[: OFFSETS[1]].sum()), "counts": counts.tolist()}
+
+
+def extend_baseline(baseline, X, y):
+    # Adds rows the model was just trained on without rescanning the file; y holds class codes in CLASS_NAMES order
+    counts = np.asarray(baseline["counts"], dtype=np.int64)
+    counts += np.bincount((np.asarray(X).astype(np.intp) + FEATURE_OFFSETS).ravel(), minlength=N_BINS)
+    counts += np.bincount(np.asarray(y, dtype=np.intp) + OFFSETS[len(SCHEMA)], minlength=N_BINS)
+    return dict(baseline, rows=baseline["rows"] + int(len(y)), counts=counts.tolist())
+
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(baseline, f)
+    os.replace(tmp_path, path)
+
+
+def load_baseline(path=BASELINE_PATH, data_path=DATA_PATH):
+    # The saved baseline if there is one, else counted from the training CSV; None if neither exists
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+        if len(baseline["counts"]) == N_BINS:
+            return baseline
+        logger.warning("Ignoring %s: it was built for a different feature schema", path)
+    if os.path.exists(data_path):
+        return build_baseline(data_path)
+    return None
+
+
+def compare(baseline_counts, window_counts, min_samples):
+    # Per block: PSI for all, KS and mean shift for the ordered inputs, and a level from ok to alert
+    results = {}
+    for (name, low, size), start in zip(BLOCKS, OFFSETS):
+        expected = baseline_counts[start : start + size]
+        actual = window_counts[start : start + size]
+        n = int(actual.sum())
+        result = {"n": n, "level": "insufficient data"}
+        if n >= min_samples:
+            result["psi"] = psi(expected, actual)
+            level = "alert" if result["psi"] >= PSI_ALERT else "warn" if result["psi"] >= PSI_WARN else "ok"
+            if name != "Prediction":
+                values = np.arange(low, low + size)
+                result["ks"] = ks(expected, actual)
+                result["ks_critical"] = float(ks_critical(expected.sum(), n))
+                result["mean"] = float(values @ actual / n)
+                result["baseline_mean"] = float(values @ expected / max(expected.sum(), 1))
+                if level == "ok" and result["ks"] > result["ks_critical"]:
+                    level = "warn"
+            else:
+                result["mix"] = dict(zip(CLASS_NAMES, (actual / n).round(4).tolist()))
+                result["baseline_mix"] = dict(zip(CLASS_NAMES, (expected / max(expected.sum(), 1)).round(4).tolist()))
+            result["level"] = level
+        results[name] = result
+    return results
+
+
+class DriftMonitor:
+    # Sliding-window counts of live inputs and predictions, compared with the training distribution.
+    # Callers only enqueue; a background thread folds each prediction into the counts and runs the
+    # comparison every `check_seconds`. Submissions are never stored, only the counters they increment.
+
+    def __init__(self, baseline_path=BASELINE_PATH, status_path=STATUS_PATH, bucket_seconds=300, window_buckets=12,
+                 check_seconds=60, min_samples=200, max_pending=10_000, data_path=DATA_PATH):
+        self.baseline_path = baseline_path
+        self.status_path = status_path
+        self.data_path = data_path
+        self.bucket_seconds = bucket_seconds
+        self.check_seconds = check_seconds
+        self.min_samples = min_samples
+        # A ring of per-interval counts: the window slides by zeroing the oldest bucket, so memory never grows
+        self.buckets = np.zeros((window_buckets, N_BINS), dtype=np.int64)
+        self.bucket_ids = np.full(window_buckets, -1, dtype=np.int64)
+        self.baseline = None
+        self.status = None
+        self.levels = {}
+        self._queue = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dropped = 0
+
+    def record(self, features, label, recorded_at=None):
+        # Encoded feature values in schema order and the predicted class name
+        self._start()
+        try:
+            self._queue.put_nowait((recorded_at or time.time(), tuple(int(value) for value in features), label))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        if self._thread is not None:
+            self._queue.join()
+
+    def add(self, recorded_at, features, label):
+        # O(1): one counter per feature plus the prediction counter, in the current bucket
+        bucket_id = int(recorded_at // self.bucket_seconds)
+        slot = bucket_id % len(self.buckets)
+        if self.bucket_ids[slot] != bucket_id:
+            self.buckets[slot] = 0
+            self.bucket_ids[slot] = bucket_id
+        self.buckets[slot, FEATURE_OFFSETS + features] += 1
+        self.buckets[slot, OFFSETS[len(SCHEMA)] + CLASS_NAMES.index(label)] += 1
+
+    def window(self, now=None):
+        current = int((now or time.time()) // self.bucket_seconds)
+        live = self.bucket_ids > current - len(self.buckets)
+        return self.buckets[live].sum(axis=0)
+
+    def check(self, now=None):
+        if self.baseline is None:
+            self.baseline = load_baseline(self.baseline_path, self.data_path)
+            if self.baseline is None:
+                return None
+        results = compare(np.asarray(self.baseline["counts"]), self.window(now), self.min_samples)
+        for name, result in results.items():
+            # Log on changes of level only, so a lasting shift is reported once rather than every check
+            previous = self.levels.get(name, "ok")
+            level = result["level"]
+            if level in ("warn", "alert") and level != previous:
+                log = logger.error if level == "alert" else logger.warning
+                log("Drift %s for %s: PSI %.3f over the last %d predictions%s", level, name, result["psi"], result["n"],
+                    f" (mean {result['mean']:.2f} vs {result['baseline_mean']:.2f} in training)" if "mean" in result else "")
+            elif level == "ok" and previous in ("warn", "alert"):
+                logger.info("Drift for %s back within bounds", name)
+            if level != "insufficient data":
+                self.levels[name] = level
+        self.status = {
+            "checked_at": time.time(),
+            "window_seconds": self.bucket_seconds * len(self.buckets),
+            "baseline_rows": self.baseline["rows"],
+            "pid": os.getpid(),
+            "dropped": self.dropped,
+            "features": results,
+        }
+        if self.status_path:
+            tmp_path = f"{self.status_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.status, f, indent=2)
+            os.replace(tmp_path, self.status_path)
+        return self.status
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        next_check = time.monotonic() + self.check_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(next_check - time.monotonic(), 0.01))
+            except queue.Empty:
+                item = None
+            if item is not None:
+                try:
+                    self.add(*item)
+                except (ValueError, IndexError):
+                    logger.warning("Skipping a prediction outside the monitored ranges")
+                finally:
+                    self._queue.task_done()
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + self.check_seconds
+                try:
+                    self.check()
+                except Exception:
+                    logger.exception("Drift check failed")
+
+
+DRIFT = DriftMonitor(
+    os.environ.get("DRIFT_BASELINE_PATH", BASELINE_PATH),
+    os.environ.get("DRIFT_STATUS_PATH", STATUS_PATH),
+    check_seconds=float(os.environ.get("DRIFT_CHECK_SECONDS", 60)),
+)
+
+
+def replay(monitor, path, model_path):
+    # Feeds a survey file through the monitor with the served model's predictions, as if it were live traffic
+    import pandas as pd
+
+    from feature_schema import encode_columns
+    from calibration import labels_and_scores, load_calibrator
+    from stress_model import load_classifier
+
+    model, label_encoder = load_classifier(model_path)
+    calibrator = load_calibrator()
+    now = time.time()
+    for chunk in pd.read_csv(path, chunksize=50_000):
+        X = encode_columns(chunk)
+        labels = label_encoder.inverse_transform(model.classes_[labels_and_scores(model.predict_proba(X), calibrator)[0]])
+        for features, label in zip(X.astype(np.intp), labels):
+            monitor.add(now, features, label)
+    return monitor.check(now)
+
+
+def main():
+    from stress_model import MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Build the drift baseline, or check a survey file against it.")
+    parser.add_argument("--data", default=DATA_PATH, help="Training CSV the baseline is counted from")
+    parser.add_argument("--output", default=BASELINE_PATH)
+    parser.add_argument("--replay", metavar="CSV", help="Instead, score this file and report its drift against the baseline")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.replay:
+        monitor = DriftMonitor(args.output, status_path=None, min_samples=1, data_path=args.data)
+        status = replay(monitor, args.replay, args.model)
+        for name, result in status["features"].items():
+            detail = f"KS {result['ks']:.3f} (critical {result['ks_critical']:.3f}), mean {result['mean']:.2f} vs {result['baseline_mean']:.2f}" if "ks" in result else f"mix {result['mix']} vs {result['baseline_mix']}"
+            print(f"{name:<14}{result['level']:>7}  PSI {result['psi']:.3f}  {detail}")
+        return
+
+    baseline = build_baseline(args.data)
+    save_baseline(baseline, args.output)
+    print(f"Wrote {args.output} from {baseline['rows']} rows of {args.data}")
+
+
+if __name__ == "__main__":
+    main()
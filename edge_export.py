@@ -0,0 +1,235 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+
+import numpy as np
+
+from calibration import CALIBRATION_PATH, SEVERITY, load_calibrator
+from feature_schema import INPUT_RANGES
+from stress_model import MODEL_PATH, create_label_encoder, load_classifier
+
+EDGE_PATH = "student_stress_model.edge"
+
+# Same layout as the .forest file (magic, header length, JSON header, 64-byte aligned arrays),
+# with model metadata in the header so the runtime needs nothing else
+MAGIC = b"SSEDGE01"
+ALIGNMENT = 64
+
+# Comparison thresholds are stored as int8, leaves past the last internal node
+THRESHOLD_DTYPE = np.int8
+VALUE_DTYPES = {8: np.uint8, 16: np.uint16}
+
+
+def index_dtype(count):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if count <= np.iinfo(dtype).max + 1:
+            return dtype
+    raise ValueError(f"{count} nodes do not fit 32-bit indices")
+
+
+def quantize(distribution, scale):
+    # Integer class weights summing to exactly `scale` (largest remainder rounding)
+    scaled = distribution / distribution.sum() * scale
+    weights = np.floor(scaled).astype(np.int64)
+    shortfall = scale - int(weights.sum())
+    weights[np.argsort(weights - scaled)[:shortfall]] += 1
+    return tuple(int(weight) for weight in weights)
+
+
+def compact_forest(model, n_trees=None, value_bits=8):
+    # Thresholds become integers (x <= 6.5 is x <= 6 for integer x), splits that the input ranges or
+    # earlier splits on the same path already decide are dropped, and identical leaves and subtrees
+    # across all trees are stored once
+    scale = np.iinfo(VALUE_DTYPES[value_bits]).max
+    leaves, internal = {}, {}
+    low0 = [low for _, low, _ in INPUT_RANGES]
+    high0 = [high for _, _, high in INPUT_RANGES]
+
+    def visit(tree, node, low, high):
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left == -1:
+            # Leaves get negative references until the number of internal nodes is known
+            return ~leaves.setdefault(quantize(tree.value[node, 0], scale), len(leaves))
+        feature = int(tree.feature[node])
+        threshold = int(np.floor(tree.threshold[node]))
+        if high[feature] <= threshold:
+            return visit(tree, left, low, high)
+        if low[feature] > threshold:
+            return visit(tree, right, low, high)
+        left_ref = visit(tree, left, low, high[:feature] + [threshold] + high[feature + 1 :])
+        right_ref = visit(tree, right, low[:feature] + [threshold + 1] + low[feature + 1 :], high)
+        if left_ref == right_ref:
+            return left_ref
+        return internal.setdefault((feature, threshold, left_ref, right_ref), len(internal))
+
+    estimators = model.estimators_[:n_trees]
+    roots = [visit(estimator.tree_, 0, low0, high0) for estimator in estimators]
+
+    n_internal = len(internal)
+    dtype = index_dtype(n_internal + len(leaves))
+    resolve = np.vectorize(lambda ref: ref if ref >= 0 else n_internal + ~ref, otypes=[np.int64])
+    keys = np.array(list(internal), dtype=np.int64).reshape(-1, 4)
+    return {
+        "feature": keys[:, 0].astype(np.uint8),
+        "threshold": keys[:, 1].astype(THRESHOLD_DTYPE),
+        "left": resolve(keys[:, 2]).astype(dtype) if n_internal else keys[:, 2].astype(dtype),
+        "right": resolve(keys[:, 3]).astype(dtype) if n_internal else keys[:, 3].astype(dtype),
+        "value": np.array(list(leaves), dtype=VALUE_DTYPES[value_bits]),
+        "roots": resolve(np.array(roots)).astype(dtype),
+    }
+
+
+def predict_proba(arrays, X):
+    # Vectorized evaluation of a compact forest, for checking it against the original model
+    X = np.asarray(X).astype(np.int64)
+    n_internal = len(arrays["feature"])
+    nodes = np.repeat(arrays["roots"][np.newaxis, :].astype(np.int64), len(X), axis=0)
+    rows = np.arange(len(X))[:, np.newaxis]
+    active = nodes < n_internal
+    while active.any():
+        index = np.where(active, nodes, 0)
+        go_left = X[rows, arrays["feature"][index]] <= arrays["threshold"][index]
+        nodes = np.where(active, np.where(go_left, arrays["left"][index], arrays["right"][index]), nodes)
+        active = nodes < n_internal
+    weights = arrays["value"][nodes - n_internal].sum(axis=1, dtype=np.int64)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_edge(arrays, meta, path=EDGE_PATH):
+    arrays = {name: np.require(array, requirements="C") for name, array in arrays.items()}
+    specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        # The runtime reads arrays with memoryview, which uses native (little-endian) order
+        specs[name] = {"dtype": array.dtype.newbyteorder("<").str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    header_bytes = json.dumps({"arrays": specs, "meta": meta}).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + len(header_bytes).to_bytes(8, "little") + header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + specs[name]["offset"])
+            f.write(array.astype(array.dtype.newbyteorder("<")).tobytes())
+    os.replace(tmp_path, path)
+    return data_start + offset
+
+
+def build_meta(model, arrays, calibrator=None, source=None, label_encoder=None):
+    classes = [str(name) for name in (label_encoder or create_label_encoder()).inverse_transform(model.classes_)]
+    meta = {
+        "features": [[name, low, high] for name, low, high in INPUT_RANGES],
+        "classes": classes,
+        "severity": [int(SEVERITY[name]) for name in classes],
+        "n_trees": len(arrays["roots"]),
+        "source": source,
+    }
+    if calibrator is not None:
+        meta["calibration"] = {"coef": calibrator.coef.tolist(), "intercept": calibrator.intercept.tolist()}
+    return meta
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def full_grid():
+    axes = [np.arange(low, high + 1) for _, low, high in INPUT_RANGES]
+    return np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(axes))
+
+
+def runtime_rss_kib(code):
+    # Peak RSS of a fresh interpreter that loads a model and answers one prediction (Linux; ru_maxrss
+    # would include the parent's peak, which survives fork and exec)
+    script = f"import warnings; warnings.filterwarnings('ignore'); {code}; print(open('/proc/self/status').read())"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return int(re.search(r"VmHWM:\s+(\d+)", result.stdout).group(1))
+
+
+def report(model, label_encoder, model_path, data_path, tree_counts, value_bits, tmp_dir):
+    import pandas as pd
+
+    from feature_schema import encode_columns
+
+    frame = pd.read_csv(data_path)
+    X, y = encode_columns(frame), frame["StressLevel"].to_numpy()
+    class_names = label_encoder.inverse_transform(model.classes_)
+    grid = full_grid()
+    grid_proba = model.predict_proba(grid)
+    grid_labels = model.classes_[grid_proba.argmax(axis=1)]
+
+    rows = [{
+        "format": "pickle (sklearn)",
+        "trees": len(model.estimators_),
+        "bytes": os.path.getsize(model_path),
+        "accuracy": float(np.mean(class_names[model.predict(X)] == y)),
+        "grid_agreement": 1.0,
+        "max_proba_error": 0.0,
+    }]
+    for n_trees in tree_counts:
+        for bits in value_bits:
+            arrays = compact_forest(model, n_trees, bits)
+            path = os.path.join(tmp_dir, f"edge-{n_trees}-{bits}.edge")
+            size = save_edge(arrays, build_meta(model, arrays, label_encoder=label_encoder), path)
+            proba = predict_proba(arrays, grid)
+            rows.append({
+                "format": f"edge, {bits}-bit leaves",
+                "trees": len(arrays["roots"]),
+                "bytes": size,
+                "internal_nodes": len(arrays["feature"]),
+                "leaves": len(arrays["value"]),
+                "accuracy": float(np.mean(class_names[predict_proba(arrays, X).argmax(axis=1)] == y)),
+                "grid_agreement": float(np.mean(model.classes_[proba.argmax(axis=1)] == grid_labels)),
+                # Against the full forest, so pruned-tree rows show sampling error as well as rounding
+                "max_proba_error": float(np.abs(proba - grid_proba).max()),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a compact, integer-only forest for the stdlib edge runtime.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=EDGE_PATH)
+    parser.add_argument("--trees", type=int, help="Keep only the first N trees")
+    parser.add_argument("--value-bits", type=int, choices=sorted(VALUE_DTYPES), default=8, help="Precision of the stored leaf class weights")
+    parser.add_argument("--calibration", default=CALIBRATION_PATH, help="Embed this calibration map so the runtime can report stress scores")
+    parser.add_argument("--report", metavar="CSV", help="Compare size and accuracy of several export settings on this CSV")
+    args = parser.parse_args()
+
+    model, label_encoder = load_classifier(args.model)
+    arrays = compact_forest(model, args.trees, args.value_bits)
+    size = save_edge(arrays, build_meta(model, arrays, load_calibrator(args.calibration), file_sha256(args.model), label_encoder), args.output)
+    print(
+        f"Wrote {len(arrays['roots'])} trees as {len(arrays['feature'])} internal nodes and {len(arrays['value'])} distinct leaves"
+        f" ({size / 1024:.1f} KiB, {arrays['left'].dtype} indices) to {args.output}"
+    )
+
+    if args.report:
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rows = report(model, label_encoder, args.model, args.report, (None, 50, 25, 10), sorted(VALUE_DTYPES), tmp_dir)
+        print(f"\n{'format':<22}{'trees':>6}{'KiB':>9}{'nodes':>7}{'leaves':>7}{'accuracy':>10}{'grid agreement':>16}{'max |dp|':>10}")
+        for row in rows:
+            print(
+                f"{row['format']:<22}{row['trees']:>6}{row['bytes'] / 1024:>9.1f}{row.get('internal_nodes', ''):>7}"
+                f"{row.get('leaves', ''):>7}{row['accuracy']:>10.3f}{row['grid_agreement']:>16.4f}{row['max_proba_error']:>10.4f}"
+            )
+        sklearn_rss = runtime_rss_kib(f"import stress_model; stress_model.load_model({args.model!r}).predict([[20, 7, 4, 6, 2, 1]])")
+        edge_rss = runtime_rss_kib(f"import edge_runtime; edge_runtime.EdgeForest.load({args.output!r}).predict([20, 7, 4, 6, 2, 1])")
+        print(f"\nPeak RSS for one prediction: sklearn pickle {sklearn_rss / 1024:.1f} MiB, edge runtime {edge_rss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
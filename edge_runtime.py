@@ -0,0 +1,119 @@
+import json
+import math
+import mmap
+import sys
+
+# Standard library only: a kiosk needs this file and a .edge export from edge_export.py, nothing else
+
+MAGIC = b"SSEDGE01"
+
+# NumPy dtype strings written by the exporter, as memoryview formats (the exporter writes little-endian)
+FORMATS = {"|u1": "B", "|i1": "b", "<u2": "H", "<u4": "I"}
+
+
+class EdgeForest:
+    # Memory-mapped compact forest: internal nodes first, then distinct leaves holding integer class weights
+
+    def __init__(self, arrays, meta, buffer=None):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.meta = meta
+        self.classes = meta["classes"]
+        self.features = meta["features"]
+        self.n_internal = len(self.feature)
+        self._buffer = buffer
+
+    @classmethod
+    def load(cls, path):
+        if sys.byteorder != "little":
+            raise ValueError("The edge runtime needs a little-endian machine")
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        if bytes(view[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not an edge forest file")
+        header_len = int.from_bytes(view[len(MAGIC) : len(MAGIC) + 8], "little")
+        header_end = len(MAGIC) + 8 + header_len
+        header = json.loads(bytes(view[len(MAGIC) + 8 : header_end]))
+        data_start = -(-header_end // 64) * 64
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            fmt = FORMATS[spec["dtype"]]
+            count = math.prod(spec["shape"])
+            start = data_start + spec["offset"]
+            # Flat views; leaf values are indexed as leaf * n_classes + class
+            arrays[name] = view[start : start + count * view[:0].cast(fmt).itemsize].cast(fmt)
+        return cls(arrays, header["meta"], buffer)
+
+    def validate(self, features):
+        # Integer answers in schema order, as the app collects them (SocialSupport: 0 = No, 1 = Yes)
+        if len(features) != len(self.features):
+            raise ValueError(f"Expected {len(self.features)} values ({', '.join(name for name, _, _ in self.features)}), got {len(features)}")
+        row = []
+        for value, (name, low, high) in zip(features, self.features):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+                raise ValueError(f"{name} must be a whole number")
+            if not low <= value <= high:
+                raise ValueError(f"{name} must be between {low} and {high}")
+            row.append(int(value))
+        return row
+
+    def predict_proba(self, features):
+        x = self.validate(features)
+        n_classes = len(self.classes)
+        totals = [0] * n_classes
+        feature, threshold, left, right, value, n_internal = self.feature, self.threshold, self.left, self.right, self.value, self.n_internal
+        for node in self.roots:
+            while node < n_internal:
+                node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+            base = (node - n_internal) * n_classes
+            for k in range(n_classes):
+                totals[k] += value[base + k]
+        total = sum(totals)
+        return [weight / total for weight in totals]
+
+    def predict(self, features):
+        return self.label(self.predict_proba(features))
+
+    def calibrate(self, proba):
+        # The export's calibration map, when it carries one; the label and the score are both read from the result
+        calibration = self.meta.get("calibration")
+        if calibration is None:
+            return proba
+        logs = [math.log(min(max(p, 1e-4), 1.0)) for p in proba]
+        logits = [sum(c * l for c, l in zip(row, logs)) + b for row, b in zip(calibration["coef"], calibration["intercept"])]
+        top = max(logits)
+        weights = [math.exp(logit - top) for logit in logits]
+        return [weight / sum(weights) for weight in weights]
+
+    def label(self, proba):
+        calibrated = self.calibrate(proba)
+        return self.classes[calibrated.index(max(calibrated))]
+
+    def stress_score(self, proba):
+        # Same 0-100 score as the app: calibrated expected severity
+        return sum(p * severity for p, severity in zip(self.calibrate(proba), self.meta["severity"])) * 50.0
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("usage: python edge_runtime.py MODEL.edge AGE SLEEP STUDY SCREEN EXERCISE SOCIAL_SUPPORT(0/1)")
+    forest = EdgeForest.load(sys.argv[1])
+    try:
+        proba = forest.predict_proba([float(value) for value in sys.argv[2:]])
+    except ValueError as exc:
+        sys.exit(f"Invalid input: {exc}")
+    print(json.dumps({
+        "prediction": forest.label(proba),
+        "stress_score": round(forest.stress_score(proba), 1),
+        "probabilities": dict(zip(forest.classes, (round(p, 4) for p in proba))),
+    }))
+
+
+if __name__ == "__main__":
+    main()
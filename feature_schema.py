@@ -0,0 +1,133 @@
+from collections import namedtuple
+
+import numpy as np
+
+# One model input: inclusive bounds, and for categorical inputs the accepted answers and their codes
+Feature = namedtuple("Feature", ["name", "low", "high", "categories"])
+
+# Column order expected by the model
+SCHEMA = (
+    Feature("Age", 17, 25, None),
+    Feature("SleepHours", 1, 10, None),
+    Feature("StudyHours", 1, 10, None),
+    Feature("ScreenTime", 1, 12, None),
+    Feature("Exercise", 0, 7, None),
+    Feature("SocialSupport", 0, 1, {"no": 0, "yes": 1}),
+)
+FEATURE_NAMES = tuple(feature.name for feature in SCHEMA)
+INPUT_RANGES = tuple((feature.name, feature.low, feature.high) for feature in SCHEMA)
+DTYPE = np.float64
+
+
+class FeatureValidationError(ValueError):
+    # Names the offending input and, for batches, the first bad row (0-based)
+
+    def __init__(self, message, feature=None, row=None):
+        super().__init__(message if row is None else f"{message} (row {row})")
+        self.message = message
+        self.feature = feature
+        self.row = row
+
+
+def feature_by_name(name):
+    return SCHEMA[FEATURE_NAMES.index(name)]
+
+
+def encode_value(feature, value):
+    if feature.categories is not None and isinstance(value, str):
+        code = feature.categories.get(value.strip().lower())
+        if code is None:
+            raise FeatureValidationError(f"{feature.name} must be one of {', '.join(name.title() for name in feature.categories)}", feature.name)
+        return float(code)
+    if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+        raise FeatureValidationError(f"{feature.name} must be a number", feature.name)
+    if not feature.low <= value <= feature.high:
+        raise FeatureValidationError(f"{feature.name} must be between {feature.low} and {feature.high}", feature.name)
+    return float(value)
+
+
+def encode_row(values):
+    # One validated (1, n_features) row from a mapping of names to values, or a sequence in schema order
+    if isinstance(values, dict):
+        missing = [feature.name for feature in SCHEMA if feature.name not in values]
+        if missing:
+            raise FeatureValidationError(f"Missing field: {missing[0]}", missing[0])
+        values = [values[feature.name] for feature in SCHEMA]
+    if len(values) != len(SCHEMA):
+        raise FeatureValidationError(f"Expected {len(SCHEMA)} values ({', '.join(FEATURE_NAMES)}), got {len(values)}")
+    return np.array([[encode_value(feature, value) for feature, value in zip(SCHEMA, values)]], dtype=DTYPE)
+
+
+def column_values(column):
+    # NumPy view of a column where possible: Arrow numeric arrays without nulls and pandas columns convert without copying
+    if type(column).__module__.startswith("pyarrow"):
+        return column.to_numpy(zero_copy_only=False)
+    if hasattr(column, "to_numpy"):
+        return column.to_numpy()
+    return np.asarray(column)
+
+
+def encode_column(feature, values, out):
+    # Writes one encoded column into `out` with vectorized conversion; only the error path looks at single rows
+    if values.dtype.kind in "OUS":
+        if feature.categories is not None:
+            # Normalize each distinct answer once, then broadcast its code back over the rows
+            answers, inverse = np.unique(values.astype(str), return_inverse=True)
+            codes = np.array([feature.categories.get(answer.strip().lower(), np.nan) for answer in answers], dtype=DTYPE)
+            out[:] = codes[inverse.ravel()]
+        else:
+            try:
+                out[:] = values.astype(DTYPE)
+            except ValueError:
+                row = next(i for i, value in enumerate(values) if not _is_number(value))
+                raise FeatureValidationError(f"{feature.name} must be a number, got {values[row]!r}", feature.name, row) from None
+    else:
+        out[:] = values
+    bad = ~((out >= feature.low) & (out <= feature.high))
+    if bad.any():
+        row = int(np.argmax(bad))
+        if feature.categories is not None and values.dtype.kind in "OUS":
+            choices = ", ".join(name.title() for name in feature.categories)
+            raise FeatureValidationError(f"{feature.name} must be one of {choices}, got {values[row]!r}", feature.name, row)
+        raise FeatureValidationError(f"{feature.name} must be between {feature.low} and {feature.high}", feature.name, row)
+
+
+def encode_columns(columns, out=None):
+    # Column-wise batch (dict of arrays, pandas DataFrame, Arrow Table or RecordBatch) into one contiguous
+    # (n_rows, n_features) float array; pass `out` to reuse a preallocated buffer across chunks
+    arrays = []
+    for feature in SCHEMA:
+        try:
+            arrays.append(column_values(columns[feature.name]))
+        except KeyError:
+            raise FeatureValidationError(f"Missing column: {feature.name}", feature.name) from None
+    n_rows = len(arrays[0])
+    if out is None or out.shape[0] < n_rows:
+        out = np.empty((n_rows, len(SCHEMA)), dtype=DTYPE)
+    out = out[:n_rows]
+    for index, (feature, values) in enumerate(zip(SCHEMA, arrays)):
+        encode_column(feature, values, out[:, index])
+    return out
+
+
+def validate_array(X):
+    # Already-encoded features pass through without a copy when they are contiguous float64
+    X = np.require(X, dtype=DTYPE, requirements="C")
+    if X.ndim != 2 or X.shape[1] != len(SCHEMA):
+        raise FeatureValidationError(f"Expected an (n, {len(SCHEMA)}) array, got shape {X.shape}")
+    low = np.array([feature.low for feature in SCHEMA])
+    high = np.array([feature.high for feature in SCHEMA])
+    bad = ~((X >= low) & (X <= high))
+    if bad.any():
+        row, column = np.argwhere(bad)[0]
+        feature = SCHEMA[column]
+        raise FeatureValidationError(f"{feature.name} must be between {feature.low} and {feature.high}", feature.name, int(row))
+    return X
+
+
+def _is_number(value):
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
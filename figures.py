@@ -0,0 +1,239 @@
+import json
+from functools import lru_cache
+
+import plotly.graph_objects as go
+
+# Gauge color and emoji for each predicted stress level
+STRESS_STYLES = {
+    "High": ("#ff4757", "🔴"),
+    "Medium": ("#ffa502", "🟡"),
+    "Low": ("#2ed573", "🟢"),
+}
+
+RADAR_CATEGORIES = ['Sleep Quality', 'Study Balance', 'Screen Time', 'Exercise', 'Social Support']
+
+DRIVER_LABELS = ['Age', 'Sleep Hours', 'Study Hours', 'Screen Time', 'Exercise', 'Social Support']
+RAISES_COLOR = "#ff4757"
+LOWERS_COLOR = "#2ed573"
+
+
+def build_gauge(stress_label, score):
+    color, _ = STRESS_STYLES[stress_label]
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = score,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Stress Level", 'font': {'size': 20, 'color': '#2d3748'}},
+        gauge = {
+            'axis': {'range': [None, 100], 'tickcolor': '#4a5568'},
+            'bar': {'color': color, 'thickness': 0.8},
+            'steps': [
+                {'range': [0, 30], 'color': "#e6ffed"},
+                {'range': [30, 70], 'color': "#fff3cd"},
+                {'range': [70, 100], 'color': "#ffe6e6"}
+            ],
+            'threshold': {
+                'line': {'color': color, 'width': 4},
+                'thickness': 0.75,
+                'value': score
+            }
+        }
+    ))
+    fig.update_layout(
+        height=300,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'color': '#2d3748'}
+    )
+    return fig
+
+
+def lifestyle_scores(sleep, study, screen, exercise, social_support_val):
+    return [
+        min(sleep / 8 * 100, 100),  # Sleep score
+        max(0, 100 - (study - 4) * 15),  # Study balance (optimal around 4-5 hours)
+        max(0, 100 - (screen - 4) * 10),  # Screen time (lower is better)
+        min(exercise / 4 * 100, 100),  # Exercise score
+        social_support_val * 100  # Social support
+    ]
+
+
+def build_radar(scores):
+    fig_radar = go.Figure()
+    fig_radar.add_trace(go.Scatterpolar(
+        r=scores,
+        theta=RADAR_CATEGORIES,
+        fill='toself',
+        name='Your Profile',
+        line_color='#667eea',
+        fillcolor='rgba(102, 126, 234, 0.2)'
+    ))
+
+    fig_radar.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 100],
+                tickfont={'color': '#4a5568'},
+                gridcolor='#e2e8f0'
+            ),
+            angularaxis=dict(
+                tickfont={'color': '#2d3748'}
+            )
+        ),
+        showlegend=True,
+        title={
+            'text': "Personal Wellness Profile",
+            'x': 0.5,
+            'font': {'size': 20, 'color': '#2d3748'}
+        },
+        height=500,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'color': '#2d3748'}
+    )
+    return fig_radar
+
+
+def build_drivers(contributions):
+    # Stress-score points each input adds to or removes from the forest's average prediction
+    fig = go.Figure(go.Bar(
+        x=contributions,
+        y=DRIVER_LABELS,
+        orientation='h',
+        marker={'color': [RAISES_COLOR if value > 0 else LOWERS_COLOR for value in contributions]},
+        hovertemplate="%{y}: %{x:+.1f} points<extra></extra>"
+    ))
+    fig.update_layout(
+        title={'text': "What's Driving Your Result", 'x': 0.5, 'font': {'size': 20, 'color': '#2d3748'}},
+        xaxis={'title': "Effect on stress score", 'zeroline': True, 'zerolinecolor': '#4a5568'},
+        yaxis={'autorange': 'reversed'},
+        height=350,
+        showlegend=False,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'color': '#2d3748'}
+    )
+    return fig
+
+
+def build_cohort_bars(labels, shares, counts, levels, title):
+    # 100%-stacked stress distribution per group, with the group size on hover
+    fig = go.Figure([
+        go.Bar(
+            x=labels,
+            y=shares[:, index] * 100,
+            name=level,
+            marker_color=STRESS_STYLES[level][0],
+            customdata=counts.sum(axis=1),
+            hovertemplate=f"%{{x}}: %{{y:.1f}}% {level}<br>%{{customdata}} students<extra></extra>"
+        )
+        for index, level in enumerate(levels)
+    ])
+    fig.update_layout(
+        barmode='stack',
+        title={'text': title, 'x': 0.5, 'font': {'size': 18, 'color': '#2d3748'}},
+        xaxis={'type': 'category'},
+        yaxis={'title': "Students (%)", 'range': [0, 100]},
+        height=380,
+        legend={'orientation': 'h', 'y': -0.2},
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'color': '#2d3748'}
+    )
+    return fig
+
+
+def build_trend(times, scores, labels):
+    # Stress score per analysis over time, each point colored by its predicted level
+    fig = go.Figure(go.Scatter(
+        x=times,
+        y=scores,
+        mode='lines+markers',
+        line={'color': '#667eea', 'width': 2},
+        marker={'size': 10, 'color': [STRESS_STYLES[label][0] for label in labels]},
+        customdata=labels,
+        hovertemplate="%{x|%b %d, %H:%M}<br>Stress score: %{y:.0f} (%{customdata})<extra></extra>"
+    ))
+    fig.update_layout(
+        title={'text': "Your Stress Trend", 'x': 0.5, 'font': {'size': 20, 'color': '#2d3748'}},
+        yaxis={'title': "Stress score", 'range': [0, 100]},
+        height=350,
+        showlegend=False,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'color': '#2d3748'}
+    )
+    return fig
+
+
+def build_what_if_heatmap(x_values, y_values, scores, x_label, y_label, current):
+    fig = go.Figure(go.Heatmap(
+        x=x_values,
+        y=y_values,
+        z=scores,
+        zmin=0,
+        zmax=100,
+        colorscale=[[0, "#2ed573"], [0.5, "#ffa502"], [1, "#ff4757"]],
+        colorbar={'title': {'text': "Stress score"}},
+        hovertemplate=f"{x_label}: %{{x}}<br>{y_label}: %{{y}}<br>Stress score: %{{z:.0f}}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=[current[0]],
+        y=[current[1]],
+        mode='markers',
+        marker={'symbol': 'x', 'size': 14, 'color': '#2d3748'},
+        name='You today',
+        hoverinfo='skip'
+    ))
+    fig.update_layout(
+        title={'text': f"{y_label} × {x_label}", 'x': 0.5, 'font': {'size': 18, 'color': '#2d3748'}},
+        xaxis={'title': x_label, 'dtick': 1},
+        yaxis={'title': y_label, 'dtick': 1},
+        height=450,
+        showlegend=False,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'color': '#2d3748'}
+    )
+    return fig
+
+
+@lru_cache(maxsize=None)
+def _gauge_json(stress_label, score):
+    return build_gauge(stress_label, score).to_json()
+
+
+def gauge_json(stress_label, score):
+    # The gauge shows whole points, so at most 3 x 101 distinct gauges are built per process
+    return _gauge_json(stress_label, int(round(score)))
+
+
+@lru_cache(maxsize=None)
+def _radar_template():
+    return json.loads(build_radar([0] * len(RADAR_CATEGORIES)).to_json())
+
+
+def radar_json(scores):
+    # Swap the r vector into the pre-validated template instead of rebuilding the figure
+    template = _radar_template()
+    trace = dict(template["data"][0], r=[float(score) for score in scores])
+    return json.dumps(dict(template, data=[trace]))
+
+
+@lru_cache(maxsize=None)
+def _drivers_template():
+    return json.loads(build_drivers([0.0] * len(DRIVER_LABELS)).to_json())
+
+
+def drivers_json(contributions):
+    template = _drivers_template()
+    values = [float(value) for value in contributions]
+    colors = [RAISES_COLOR if value > 0 else LOWERS_COLOR for value in values]
+    trace = dict(template["data"][0], x=values, marker=dict(template["data"][0]["marker"], color=colors))
+    return json.dumps(dict(template, data=[trace]))
+
+
+def figure_from_json(spec):
+    # The spec was produced by a validated figure, so skip Plotly's validators when rebuilding it
+    return go.Figure(json.loads(spec), _validate=False)
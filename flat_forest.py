@@ -0,0 +1,170 @@
+import argparse
+import json
+import mmap
+import os
+
+import numpy as np
+
+FOREST_PATH = "student_stress_model.forest"
+# class_names (the decoded stress levels, indexed by class code) and source_sha256 (of the pickle it was
+# exported from) are absent from older exports
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "classes", "max_depth", "class_names", "source_sha256")
+
+# File layout: magic, header length, JSON header (dtype/shape/offset per array), then 64-byte aligned array data
+MAGIC = b"SSFOREST"
+ALIGNMENT = 64
+
+
+def flatten_forest(model, class_names=None, source_sha256=None):
+    # Concatenate every tree's node arrays; leaves point at themselves so all trees can be stepped in lockstep
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append((np.where(is_leaf, node_ids, tree.children_left) + offset).astype(np.int32))
+        rights.append((np.where(is_leaf, node_ids, tree.children_right) + offset).astype(np.int32))
+        value = tree.value[:, 0, :]
+        values.append(value / value.sum(axis=1, keepdims=True))
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int32),
+        "classes": np.asarray(model.classes_),
+        "max_depth": np.array(max_depth),
+        **({} if class_names is None else {"class_names": np.asarray(class_names, dtype=str)}),
+        **({} if source_sha256 is None else {"source_sha256": np.array(source_sha256)}),
+    }
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_forest(arrays, path=FOREST_PATH):
+    arrays = {name: np.require(arrays[name], requirements="C") for name in ARRAYS if name in arrays}
+    header = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        header[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    header_bytes = json.dumps(header).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    # Write beside the target and rename, so processes mapping the old file keep a consistent view
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + len(header_bytes).to_bytes(8, "little") + header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header[name]["offset"])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_forest_arrays(path=FOREST_PATH, use_mmap=True):
+    with open(path, "rb") as f:
+        # A read-only shared mapping lets every worker process use the same physical pages
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap else f.read()
+    if buffer[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a flat forest file")
+    header_length = int.from_bytes(buffer[len(MAGIC) : len(MAGIC) + 8], "little")
+    header = json.loads(buffer[len(MAGIC) + 8 : len(MAGIC) + 8 + header_length])
+    data_start = _align(len(MAGIC) + 8 + header_length)
+
+    arrays = {}
+    for name, spec in header.items():
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        array = np.frombuffer(buffer, dtype=spec["dtype"], count=count, offset=data_start + spec["offset"])
+        arrays[name] = array.reshape(tuple(spec["shape"]))
+    return arrays
+
+
+class FlatForest:
+    # Pure-NumPy stand-in for RandomForestClassifier.predict / predict_proba
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth, class_names=None, source_sha256=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        self.class_names = class_names
+        self.source_sha256 = None if source_sha256 is None else str(source_sha256)
+        self.n_features_in_ = int(feature.max()) + 1
+
+    @classmethod
+    def load(cls, path=FOREST_PATH, use_mmap=True):
+        return cls(**read_forest_arrays(path, use_mmap))
+
+    def apply(self, X):
+        # Leaf index reached in every tree, shape (n_samples, n_trees)
+        X = np.asarray(X, dtype=np.float32)
+        nodes = np.repeat(self.roots[np.newaxis, :], X.shape[0], axis=0)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X, chunk_size=8192):
+        # Chunked so the (rows x trees) node matrix stays small for large batches
+        X = np.asarray(X)
+        proba = np.empty((X.shape[0], self.value.shape[1]))
+        for start in range(0, X.shape[0], chunk_size):
+            proba[start : start + chunk_size] = self.value[self.apply(X[start : start + chunk_size])].mean(axis=1)
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def verify(model, forest, csv_path):
+    import pandas as pd
+
+    from feature_schema import encode_columns
+
+    features = encode_columns(pd.read_csv(csv_path))
+    mismatches = int(np.sum(model.predict(features) != forest.predict(features)))
+    max_diff = float(np.abs(model.predict_proba(features) - forest.predict_proba(features)).max())
+    return len(features), mismatches, max_diff
+
+
+def main():
+    from stress_model import MODEL_PATH, load_classifier
+    from train import file_sha256
+
+    parser = argparse.ArgumentParser(description="Export the pickled forest to flat NumPy arrays.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=FOREST_PATH)
+    parser.add_argument("--verify", metavar="CSV", help="Check the export against model.predict on this CSV")
+    args = parser.parse_args()
+
+    model, label_encoder = load_classifier(args.model)
+    arrays = flatten_forest(model, label_encoder.classes_, file_sha256(args.model))
+    save_forest(arrays, args.output)
+    print(f"Wrote {len(arrays['roots'])} trees, {len(arrays['feature'])} nodes to {args.output}")
+
+    if args.verify:
+        rows, mismatches, max_diff = verify(model, FlatForest.load(args.output), args.verify)
+        print(f"Verified on {rows} rows: {mismatches} label mismatches, max probability difference {max_diff:.2e}")
+        if mismatches:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from stress_model import CLASS_NAMES, FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PATH = "prediction_history.sqlite3"
+
+PROBA_COLUMNS = tuple(f"p_{name.lower()}" for name in CLASS_NAMES)
+COLUMNS = ("user_id", "created_at") + FEATURE_NAMES + ("label",) + PROBA_COLUMNS + ("score",)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    {", ".join(f"{name} REAL NOT NULL" for name in FEATURE_NAMES)},
+    label TEXT NOT NULL,
+    {", ".join(f"{name} REAL NOT NULL" for name in PROBA_COLUMNS)},
+    score REAL
+);
+-- Trend queries read one user's rows newest first; the index makes that a range scan
+CREATE INDEX IF NOT EXISTS predictions_user_time ON predictions (user_id, created_at);
+"""
+
+INSERT = f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+HistoryEntry = namedtuple("HistoryEntry", ["created_at", "features", "label", "proba", "score"])
+
+
+class HistoryStore:
+    # Append-only prediction log; writes go through a queue to one background thread so callers never wait on disk
+
+    def __init__(self, path=HISTORY_PATH, batch_size=1000, max_pending=100_000):
+        self.path = path
+        self.batch_size = batch_size
+        self._queue = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._schema_ready = False
+        self.written = 0
+        self.dropped = 0
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        # WAL lets trend queries read while the writer commits
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            # Files written before scores were recorded get the column added; their old rows keep NULL
+            if "score" not in {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}:
+                conn.execute("ALTER TABLE predictions ADD COLUMN score REAL")
+            self._schema_ready = True
+        return conn
+
+    def record(self, user_id, features, label, proba, score, created_at=None):
+        row = (user_id, time.time() if created_at is None else created_at)
+        row += tuple(float(value) for value in features) + (str(label),) + tuple(float(p) for p in proba) + (float(score),)
+        self._start()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Losing a history point is better than stalling a prediction
+            self.dropped += 1
+
+    def flush(self):
+        # Block until everything recorded so far is committed
+        if self._thread is not None:
+            self._queue.join()
+
+    def trend(self, user_id, since=None, limit=500):
+        # Up to `limit` most recent entries for one user, returned oldest first
+        query = f"SELECT created_at, {', '.join(FEATURE_NAMES)}, label, {', '.join(PROBA_COLUMNS)}, score FROM predictions WHERE user_id = ?"
+        params = [user_id]
+        if since is not None:
+            query += " AND created_at >= ?"
+            params.append(since)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        conn = self.connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        n_features = len(FEATURE_NAMES)
+        return [
+            HistoryEntry(row[0], row[1 : 1 + n_features], row[1 + n_features], np.array(row[2 + n_features : -1]), row[-1])
+            for row in reversed(rows)
+        ]
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        conn = self.connect()
+        while True:
+            # Wait for one row, then take whatever else queued up meanwhile and commit it in one transaction
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(INSERT, batch)
+                self.written += len(batch)
+            except sqlite3.Error:
+                logger.exception("Failed to write %d history rows to %s", len(batch), self.path)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+HISTORY = HistoryStore(os.environ.get("PREDICTION_HISTORY_PATH", HISTORY_PATH))
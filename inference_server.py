@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from calibration import stress_scores
+from drift import DRIFT
+from model_registry import ModelRegistry
+from shadow import SHADOW
+from feature_schema import FEATURE_NAMES, encode_row
+from stress_model import MODEL_PATH
+from tenants import TENANT_POOL
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+
+
+class MicroBatcher:
+    # Collects concurrent requests for a short window and scores them with one predict_proba call per model
+
+    def __init__(self, registry, max_batch_size=256, max_wait=0.005, pool=TENANT_POOL):
+        self.registry = registry
+        self.pool = pool
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.tasks = set()
+
+    async def predict(self, features, tenant=None):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((features, future, tenant))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[2], []).append(item)
+            for tenant, group in groups.items():
+                if tenant is None:
+                    await self.score(loop, tenant, group)
+                else:
+                    # A tenant's first batch waits for its model to load; that must not hold up other batches
+                    task = asyncio.create_task(self.score(loop, tenant, group))
+                    self.tasks.add(task)
+                    task.add_done_callback(self.tasks.discard)
+
+    async def score(self, loop, tenant, batch):
+        features = np.array([features for features, _, _ in batch], dtype=np.float64)
+        try:
+            # Run the forest off the event loop so new requests keep queueing meanwhile;
+            # each batch uses whichever validated model version is current when it starts.
+            # A tenant's first request loads its model, also off the loop.
+            served = self.registry.current() if tenant is None else await loop.run_in_executor(None, self.pool.get, tenant)
+            start = time.perf_counter()
+            proba = await loop.run_in_executor(None, served.model.predict_proba, features)
+            predict_ms = (time.perf_counter() - start) * 1000
+            calibrated = proba if served.calibrator is None else served.calibrator.transform(proba)
+            scores = stress_scores(calibrated, severity=served.severity)
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        # Each version decodes with the encoder it was trained with
+        class_names = served.label_encoder.inverse_transform(served.model.classes_)
+        labels = class_names[np.argmax(calibrated, axis=1)]
+        for (_, future, _), label, probs, calibrated_probs, score in zip(batch, labels, proba, calibrated, scores):
+            if not future.done():
+                future.set_result((label, class_names, probs, calibrated_probs, score))
+        if tenant is not None:
+            # Drift baselines and shadow candidates belong to the default model
+            return
+        # Only counters are kept; the monitor folds these in on its own thread
+        for row, label in zip(features, labels):
+            DRIFT.record(row, label)
+        # Candidates see the whole batch after the answers are out; a backed-up pool drops it
+        SHADOW.submit(features, labels, primary=served, elapsed_ms=predict_ms)
+
+
+def parse_features(payload):
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    return encode_row(payload)[0]
+
+
+async def read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, version = request_line.decode("latin-1").split()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, version, headers, body
+
+
+def write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+    )
+
+
+async def handle_request(batcher, method, target, body):
+    # /predict?tenant=<name> scores with that institution's model from the tenant pool
+    url = urlsplit(target)
+    path, tenant = url.path, parse_qs(url.query).get("tenant", [None])[0]
+    if path == "/health" and method == "GET":
+        return HTTPStatus.OK, {"status": "ok"}
+    if path == "/tenants" and method == "GET":
+        return HTTPStatus.OK, batcher.pool.stats()
+    if path != "/predict":
+        return HTTPStatus.NOT_FOUND, {"error": "Not found"}
+    if method != "POST":
+        return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Use POST"}
+
+    try:
+        features = parse_features(json.loads(body or b"null"))
+    except (ValueError, json.JSONDecodeError) as exc:
+        return HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+
+    if tenant is not None:
+        try:
+            batcher.pool.path(tenant)
+        except KeyError as exc:
+            return HTTPStatus.NOT_FOUND, {"error": exc.args[0]}
+    try:
+        label, class_names, probs, calibrated_probs, score = await batcher.predict(features, tenant)
+    except Exception as exc:
+        if tenant is not None and isinstance(exc, KeyError):
+            # The tenant's directory went away after the check above
+            return HTTPStatus.NOT_FOUND, {"error": exc.args[0]}
+        if tenant is not None and isinstance(exc, ValueError):
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"The model for tenant {tenant!r} is unavailable: {exc}"}
+        # Any other failure still gets a JSON answer rather than a dropped connection
+        logger.exception("Prediction failed")
+        return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Prediction failed"}
+    return HTTPStatus.OK, {
+        "stress_level": str(label),
+        "stress_score": round(float(score), 1),
+        "probabilities": {str(name): float(p) for name, p in zip(class_names, probs)},
+        "calibrated_probabilities": {str(name): float(p) for name, p in zip(class_names, calibrated_probs)},
+    }
+
+
+async def handle_connection(batcher, reader, writer):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as exc:
+                write_response(writer, HTTPStatus.BAD_REQUEST, {"error": str(exc) or "Malformed request"}, False)
+                break
+            if request is None:
+                break
+            method, path, version, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+            status, payload = await handle_request(batcher, method, path, body)
+            write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port, model_path, max_batch_size, max_wait, reuse_port=False):
+    # Each worker loads the model itself; a .forest file is memory-mapped, so workers share its pages.
+    # The registry reloads it in the background when the file is replaced.
+    registry = ModelRegistry(model_path, forest_path=None, table_path=None).start()
+    if registry.current() is None:
+        raise SystemExit(f"Could not load a valid model from {model_path}")
+    SHADOW.start()
+    batcher = MicroBatcher(registry, max_batch_size, max_wait)
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(batcher, r, w), host, port, reuse_port=reuse_port or None
+    )
+    print(f"Serving predictions on http://{host}:{port}/predict (fields: {', '.join(FEATURE_NAMES)})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+def run_worker(args, reuse_port=False):
+    try:
+        asyncio.run(serve(args.host, args.port, args.model, args.max_batch_size, args.max_wait_ms / 1000, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP JSON prediction service with request micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long to collect requests before scoring a batch")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes sharing the port (Linux SO_REUSEPORT)")
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        run_worker(args)
+        return
+    workers = [multiprocessing.Process(target=run_worker, args=(args, True)) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_PATH = "latency_metrics.json"
+
+# Histogram bucket upper bounds in milliseconds; the last bucket catches everything slower
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+
+
+class LatencyRecorder:
+    # Per-stage latency histograms shared by every session in the process
+
+    def __init__(self, buckets_ms=BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._last_flush = 0.0
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000)
+
+    def observe(self, stage, elapsed_ms):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = {"count": 0, "sum_ms": 0.0, "max_ms": 0.0, "buckets": [0] * len(self.buckets_ms)}
+            stats["count"] += 1
+            stats["sum_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            for i, bound in enumerate(self.buckets_ms):
+                if elapsed_ms <= bound:
+                    stats["buckets"][i] += 1
+                    break
+
+    def snapshot(self):
+        with self._lock:
+            stages = {stage: dict(stats, buckets=list(stats["buckets"])) for stage, stats in self._stages.items()}
+        for stats in stages.values():
+            stats["mean_ms"] = stats["sum_ms"] / stats["count"]
+            stats["p50_ms"] = self.quantile(stats["buckets"], 0.5)
+            stats["p95_ms"] = self.quantile(stats["buckets"], 0.95)
+        return {"buckets_ms": [str(b) if b == float("inf") else b for b in self.buckets_ms], "stages": stages}
+
+    def quantile(self, counts, q):
+        # Upper bound of the bucket holding the q-th observation
+        target = q * sum(counts)
+        seen = 0
+        for bound, count in zip(self.buckets_ms, counts):
+            seen += count
+            if count and seen >= target:
+                return bound if bound != float("inf") else None
+        return None
+
+    def write(self, path=METRICS_PATH):
+        # Per-process temporary name: several server workers share the metrics file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def maybe_write(self, path=METRICS_PATH, interval=10.0):
+        # Keeps disk writes off most requests
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_flush < interval:
+                return
+            self._last_flush = now
+        self.write(path)
+
+
+RECORDER = LatencyRecorder()
+
+
+def min_spinner_seconds():
+    # Optional minimum time the "Analyzing" overlay stays visible; 0 disables it
+    try:
+        return max(0.0, float(os.environ.get("MIN_SPINNER_SECONDS", "0")))
+    except ValueError:
+        return 0.0
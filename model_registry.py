@@ -0,0 +1,203 @@
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import attributions
+import prediction_table
+from calibration import CALIBRATION_PATH, column_severity, labels_and_scores, load_calibrator
+from flat_forest import FOREST_PATH
+from stress_model import MODEL_PATH, create_label_encoder, load_bundle, load_classifier
+
+logger = logging.getLogger(__name__)
+
+# Rows held out of the served model's fit, written by train.py --promote alongside it
+VALIDATION_PATH = "student_stress_validation.csv"
+# Until a promote has written that file, the last rows of the survey CSV stand in for it
+FALLBACK_VALIDATION_PATH = "student_mental_health.csv"
+
+# Grid inputs re-predicted on load to catch a table left over from another model or calibration
+TABLE_CHECK_ROWS = 256
+
+# One immutable, validated set of artifacts; sessions hold on to the one they started with.
+# Predictions are decoded with the version's own label encoder, never a rebuilt one, and `severity` maps
+# its probability columns to stress severities through that encoder.
+ModelVersion = namedtuple(
+    "ModelVersion",
+    ["version", "model", "label_encoder", "severity", "table", "calibrator", "explainer", "attributions", "metadata", "accuracy", "loaded_at"],
+)
+
+
+class ModelRegistry:
+    # Watches the model artifacts and swaps in new versions that pass validation
+
+    def __init__(
+        self,
+        model_path=MODEL_PATH,
+        forest_path=FOREST_PATH,
+        table_path=prediction_table.TABLE_PATH,
+        attributions_path=attributions.ATTRIBUTIONS_PATH,
+        calibration_path=CALIBRATION_PATH,
+        validation_path=VALIDATION_PATH,
+        fallback_path=FALLBACK_VALIDATION_PATH,
+        fallback_fraction=0.2,
+        min_accuracy=0.8,
+        poll_interval=2.0,
+        use_mmap=True,
+    ):
+        self.model_path = model_path
+        self.forest_path = forest_path
+        self.table_path = table_path
+        self.attributions_path = attributions_path
+        self.calibration_path = calibration_path
+        self.validation_path = validation_path
+        self.fallback_path = fallback_path
+        self.fallback_fraction = fallback_fraction
+        self.min_accuracy = min_accuracy
+        self.poll_interval = poll_interval
+        self.use_mmap = use_mmap
+        self._lock = threading.Lock()
+        self._current = None
+        self._validation = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.swaps = 0
+        self.rejections = []
+        self._rejected = None
+
+    def paths(self):
+        candidates = (self.forest_path, self.model_path, self.table_path, self.attributions_path, self.calibration_path)
+        return tuple(path for path in candidates if path)
+
+    def signature(self):
+        return tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in self.paths())
+
+    def current(self):
+        with self._lock:
+            return self._current
+
+    def validation_data(self):
+        # The held-out rows, re-read whenever a promote replaces them; None when there is nothing to check against
+        if os.path.exists(self.validation_path):
+            path, fraction = self.validation_path, 1.0
+        elif self.fallback_path and os.path.exists(self.fallback_path):
+            path, fraction = self.fallback_path, self.fallback_fraction
+        else:
+            return None
+        key = path, os.stat(path).st_mtime_ns
+        if self._validation is None or self._validation[0] != key:
+            from train import load_dataset
+
+            X, y, _, _ = load_dataset(path)
+            start = int(len(y) * (1 - fraction))
+            self._validation = key, X[start:], y[start:]
+        return self._validation[1:]
+
+    def load_model(self):
+        # The flat export is preferred, but only when it was exported from the pickle now in place; a pickle
+        # dropped in by hand next to an older export is served as it is until the export is rebuilt
+        if self.forest_path and os.path.exists(self.forest_path):
+            forest, label_encoder = load_classifier(self.forest_path, self.use_mmap)
+            if not os.path.exists(self.model_path):
+                return forest, label_encoder, {}
+            from train import file_sha256
+
+            if forest.source_sha256 == file_sha256(self.model_path):
+                return forest, label_encoder, {}
+            logger.warning("%s was not exported from the current %s; serving the pickle", self.forest_path, self.model_path)
+        if self.model_path.endswith(".forest"):
+            return (*load_classifier(self.model_path, self.use_mmap), {})
+        bundle = load_bundle(self.model_path)
+        return bundle["model"], bundle["label_encoder"], bundle["metadata"]
+
+    def load_version(self, signature):
+        model, label_encoder, metadata = self.load_model()
+        severity = column_severity(model, label_encoder)
+        validation = self.validation_data()
+        if validation is None:
+            logger.warning("Validation data %s not found; accepting the model unchecked", self.validation_path)
+            X, y = np.empty((0, len(prediction_table.INPUT_RANGES))), np.empty(0)
+        else:
+            X, y = validation
+        # Checked on the labels actually served, which come from the calibrated distribution
+        calibrator = load_calibrator(self.calibration_path)
+        # sklearn refuses an empty batch, which is what an unchecked load scores
+        proba = model.predict_proba(X) if len(X) else np.empty((0, len(model.classes_)))
+        columns, _ = labels_and_scores(proba, calibrator, severity)
+        predictions = model.classes_.take(columns)
+        # Compared as stress level names, so an artifact whose encoder maps codes differently is caught too
+        accuracy = float(np.mean(label_encoder.inverse_transform(predictions) == create_label_encoder().inverse_transform(y))) if len(y) else None
+        if accuracy is not None and accuracy < self.min_accuracy:
+            raise ValueError(f"validation accuracy {accuracy:.3f} is below {self.min_accuracy:.3f}")
+
+        table = None
+        if self.table_path and os.path.exists(self.table_path):
+            table = prediction_table.load_table(self.table_path)
+            if "score" not in table.dtype.names:
+                logger.warning("Prediction table %s predates stored scores; serving without it", self.table_path)
+                table = None
+        if table is not None:
+            # A table left over from another model or calibration would silently answer with stale values,
+            # so it is checked on grid inputs whether or not there are validation rows
+            sample = prediction_table.grid_rows(TABLE_CHECK_ROWS)
+            sample_columns, sample_scores = labels_and_scores(model.predict_proba(sample), calibrator, severity)
+            table_labels, _, table_scores = prediction_table.lookup_batch(table, sample)
+            mismatches = int(np.sum((table_labels != model.classes_.take(sample_columns)) | ~np.isclose(table_scores, sample_scores, atol=1e-3)))
+            if mismatches:
+                raise ValueError(f"prediction table {self.table_path} disagrees with the model on {mismatches} of {len(sample)} sampled grid inputs")
+
+        # Flat arrays walk every tree at once, so off-grid inputs can still be explained in a few ms
+        explainer = attributions.as_flat_forest(model)
+        grid = None
+        if self.attributions_path and os.path.exists(self.attributions_path):
+            grid = attributions.load_attributions(self.attributions_path)
+            sample = prediction_table.grid_rows(attributions.CHECK_ROWS)
+            _, expected = attributions.contributions(explainer, sample)
+            if grid.shape != prediction_table.GRID_SHAPE + expected.shape[1:] or not np.allclose(
+                attributions.lookup_batch(grid, sample), expected, atol=1e-4
+            ):
+                raise ValueError(f"attributions {self.attributions_path} disagree with the model")
+        return ModelVersion(signature, model, label_encoder, severity, table, calibrator, explainer, grid, metadata, accuracy, time.time())
+
+    def refresh(self):
+        signature = self.signature()
+        current = self.current()
+        if current is not None and current.version == signature:
+            return False
+        try:
+            version = self.load_version(signature)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError) as exc:
+            self._rejected = signature
+            self.rejections.append((signature, str(exc)))
+            logger.warning("Rejected model artifacts %s: %s", self.paths(), exc)
+            return False
+        with self._lock:
+            # Readers that already took the old version keep using it until they finish
+            self._current = version
+            self.swaps += 1
+        logger.info("Serving model version %s (validation accuracy %s)", version.metadata.get("version", signature), version.accuracy)
+        return True
+
+    def start(self):
+        if self.current() is None:
+            self.refresh()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        last_seen = self.signature()
+        while not self._stop.wait(self.poll_interval):
+            signature = self.signature()
+            # Only reload once the files have stopped changing; promote writes the model file last, so a multi-file promote is seen whole
+            if signature == last_seen and signature != self._rejected:
+                self.refresh()
+            last_seen = signature
@@ -0,0 +1,74 @@
+import plotly.graph_objects as go
+import streamlit as st
+
+from latency import METRICS_PATH, RECORDER
+from prediction_cache import PREDICTION_CACHE
+from tenants import TENANT_POOL
+
+st.set_page_config(page_title="Latency Metrics", page_icon="⏱️", layout="wide")
+
+st.title("⏱️ Prediction Latency")
+st.caption(f"Per-stage timings for this server process since it started. A copy is written to `{METRICS_PATH}` periodically.")
+
+cache_stats = PREDICTION_CACHE.stats()
+st.subheader("Prediction cache")
+hits, misses, evictions, hit_rate = st.columns(4)
+hits.metric("Hits", cache_stats["hits"])
+misses.metric("Misses", cache_stats["misses"])
+evictions.metric("Evictions", cache_stats["evictions"])
+hit_rate.metric("Hit rate", f"{cache_stats['hit_rate']:.1%}", help=f"{cache_stats['size']} of {cache_stats['maxsize']} entries in use")
+
+pool_stats = TENANT_POOL.stats()
+if pool_stats["tenants"]:
+    st.subheader("Tenant models")
+    st.caption(f"{len(pool_stats['resident_tenants'])} resident, {pool_stats['resident_bytes'] / 2**20:.1f} of {pool_stats['memory_budget_bytes'] / 2**20:.0f} MiB in use")
+    st.dataframe(
+        [
+            {
+                "Tenant": tenant,
+                "Resident": stats["resident"],
+                "Hit rate": f"{stats['hit_rate']:.1%}",
+                "Hits": stats["hits"],
+                "Loads": stats["loads"],
+                "Waited on a load": stats["coalesced"],
+                "Failed loads": stats["load_failures"],
+                "Evictions": stats["evictions"],
+                "Mean load (ms)": None if stats["mean_load_ms"] is None else round(stats["mean_load_ms"], 1),
+                "Size (MiB)": round(stats["bytes"] / 2**20, 2),
+            }
+            for tenant, stats in sorted(pool_stats["tenants"].items())
+        ],
+        use_container_width=True,
+    )
+
+st.subheader("Stage timings")
+snapshot = RECORDER.snapshot()
+stages = snapshot["stages"]
+if not stages:
+    st.info("No analyses have run in this process yet.")
+    st.stop()
+
+st.dataframe(
+    [
+        {
+            "Stage": stage,
+            "Count": stats["count"],
+            "Mean (ms)": round(stats["mean_ms"], 3),
+            "p50 ≤ (ms)": stats["p50_ms"],
+            "p95 ≤ (ms)": stats["p95_ms"],
+            "Max (ms)": round(stats["max_ms"], 3),
+        }
+        for stage, stats in stages.items()
+    ],
+    use_container_width=True,
+)
+
+labels = [f"≤ {bound} ms" if bound != "inf" else "slower" for bound in snapshot["buckets_ms"]]
+stage = st.selectbox("Histogram", list(stages))
+fig = go.Figure(go.Bar(x=labels, y=stages[stage]["buckets"], marker_color="#667eea"))
+fig.update_layout(xaxis={"type": "category"}, yaxis_title="Requests", height=400)
+st.plotly_chart(fig, use_container_width=True)
+
+if st.button("Write metrics file now"):
+    RECORDER.write()
+    st.success(f"Wrote {METRICS_PATH}")
@@ -0,0 +1,79 @@
+import os
+
+import streamlit as st
+
+import cohorts
+import figures
+
+st.set_page_config(page_title="Cohort Analytics", page_icon="👥", layout="wide")
+
+# Counsellors mostly look at these; the rest are available as filters
+CHARTED = ("Age", "Sleep", "Exercise", "Social support")
+
+
+@st.cache_data(max_entries=16, show_spinner="Reading survey data...")
+def load_cube(path, mtime_ns, size):
+    # Keyed on the file's mtime and size, so a replaced export is read again and an unchanged one never is
+    return cohorts.build_cube(path)
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def cohort_counts(_cube, signature, by, filters):
+    return cohorts.aggregate(_cube, by, dict(filters))
+
+
+st.title("👥 Cohort Analytics")
+st.caption("Stress distribution across groups of surveyed students. Each file is read once; filters only re-aggregate pre-counted totals.")
+
+data_dir = os.environ.get("COHORT_DATA_DIR", cohorts.DATA_DIR)
+available = cohorts.survey_files(data_dir)
+chosen = st.sidebar.multiselect("Survey files", available, default=[cohorts.DATA_PATH] if cohorts.DATA_PATH in available else [])
+if not chosen:
+    st.info("Choose at least one survey CSV in the sidebar." if available else f"No survey CSVs found in {data_dir}.")
+    st.stop()
+
+cube, signature = 0, []
+for name in chosen:
+    path = os.path.join(data_dir, name)
+    try:
+        stat = os.stat(path)
+        cube = cube + load_cube(path, stat.st_mtime_ns, stat.st_size)
+    except (OSError, ValueError, KeyError):
+        # Wrong columns or not a CSV at all; the visitor gets the file name, not a traceback
+        st.error(f"{name} could not be read as a survey export.")
+        st.stop()
+    signature.append((path, stat.st_mtime_ns, stat.st_size))
+signature = tuple(signature)
+
+
+@st.fragment
+def dashboard():
+    # Filter changes rerun only this fragment, against the in-memory counts
+    st.subheader("Filters")
+    filter_columns = st.columns(len(cohorts.DIMENSIONS))
+    filters = []
+    for column, dimension in zip(filter_columns, cohorts.DIMENSIONS):
+        chosen = column.multiselect(dimension.name, dimension.labels, placeholder="All")
+        if chosen:
+            filters.append((dimension.name, tuple(dimension.labels.index(label) for label in chosen)))
+    filters = tuple(filters)
+
+    counts = {by: cohort_counts(cube, signature, by, filters) for by in CHARTED}
+    levels = counts[CHARTED[0]].sum(axis=0)
+    total = int(levels.sum())
+    students, *level_columns = st.columns(1 + len(cohorts.STRESS_ORDER))
+    students.metric("Students", f"{total:,}")
+    for column, level, count in zip(level_columns, cohorts.STRESS_ORDER, levels):
+        column.metric(f"{level} stress", f"{count / total:.1%}" if total else "–")
+    if not total:
+        st.info("No students match these filters.")
+        return
+
+    for row in (CHARTED[:2], CHARTED[2:]):
+        for column, by in zip(st.columns(2), row):
+            labels = cohorts.DIMENSIONS[cohorts.DIMENSION_NAMES.index(by)].labels
+            fig = figures.build_cohort_bars(labels, cohorts.shares(counts[by]), counts[by], cohorts.STRESS_ORDER, f"Stress by {by.lower()}")
+            column.plotly_chart(fig, use_container_width=True)
+
+
+dashboard()
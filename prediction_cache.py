@@ -0,0 +1,57 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+# Everything needed to render an analysis without running the model or building figures
+CachedPrediction = namedtuple(
+    "CachedPrediction", ["label", "proba", "score", "contributions", "gauge_json", "radar_json", "drivers_json"]
+)
+
+
+class PredictionCache:
+    # Bounded, thread-safe LRU cache keyed on the feature tuple
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+PREDICTION_CACHE = PredictionCache(int(os.environ.get("PREDICTION_CACHE_SIZE", "4096")))
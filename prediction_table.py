@@ -0,0 +1,79 @@
+import argparse
+import os
+
+import numpy as np
+
+from calibration import CALIBRATION_PATH, CLASS_SEVERITY, column_severity, labels_and_scores, load_calibrator
+from feature_schema import INPUT_RANGES
+from stress_model import MODEL_PATH, load_classifier
+
+TABLE_PATH = "student_stress_table.npy"
+
+# Every input is a bounded integer, so the model can be evaluated once over the full grid
+GRID_SHAPE = tuple(high - low + 1 for _, low, high in INPUT_RANGES)
+GRID_OFFSETS = tuple(low for _, low, _ in INPUT_RANGES)
+
+
+def build_table(model, calibrator=None, severity=CLASS_SEVERITY):
+    axes = [np.arange(low, high + 1) for _, low, high in INPUT_RANGES]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(axes))
+
+    proba = model.predict_proba(grid)
+    n_classes = proba.shape[1]
+    table = np.empty(grid.shape[0], dtype=[("label", "u1"), ("proba", "f4", (n_classes,)), ("score", "f4")])
+    # Label and calibrated 0-100 score are stored from the same distribution, so serving them costs nothing extra
+    columns, table["score"] = labels_and_scores(proba, calibrator, severity)
+    table["label"] = model.classes_.take(columns)
+    table["proba"] = proba
+    return table.reshape(GRID_SHAPE)
+
+
+def save_table(table, path=TABLE_PATH):
+    # np.save appends .npy to names without it, so keep the temporary name ending in .npy
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, table)
+    os.replace(tmp_path, path)
+
+
+def load_table(path=TABLE_PATH):
+    # Memory-mapped so every session and process shares the same read-only pages
+    return np.load(path, mmap_mode="r")
+
+
+def grid_rows(count):
+    # `count` inputs spread evenly over the whole grid, for checking a table or attributions against a model
+    index = np.unravel_index(np.linspace(0, np.prod(GRID_SHAPE) - 1, count).astype(np.intp), GRID_SHAPE)
+    return np.stack(index, axis=-1) + GRID_OFFSETS
+
+
+def in_grid(features):
+    return all(low <= value <= high for value, (_, low, high) in zip(features, INPUT_RANGES))
+
+
+def lookup(table, features):
+    entry = table[tuple(int(value) - offset for value, offset in zip(features, GRID_OFFSETS))]
+    return int(entry["label"]), np.array(entry["proba"]), float(entry["score"])
+
+
+def lookup_batch(table, features):
+    # Vectorized gather for many in-grid rows at once
+    index = tuple((np.asarray(features, dtype=np.intp) - GRID_OFFSETS).T)
+    entries = table[index]
+    return entries["label"].astype(np.intp), np.array(entries["proba"]), entries["score"].astype(np.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute model predictions over the full input grid.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=TABLE_PATH)
+    parser.add_argument("--calibration", default=CALIBRATION_PATH, help="Calibration map from calibration.py, used for the stored scores if present")
+    args = parser.parse_args()
+
+    model, label_encoder = load_classifier(args.model)
+    table = build_table(model, load_calibrator(args.calibration), column_severity(model, label_encoder))
+    save_table(table, args.output)
+    print(f"Wrote {table.size} predictions ({table.nbytes / 1024:.0f} KiB) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from stress_model import FEATURE_NAMES
+
+# Bullets tied to a model feature are shown and ordered by how much that feature pushes the
+# prediction toward higher stress; general bullets follow them
+RECOMMENDATIONS = {
+    "High": {
+        "title": "🚨 High Stress Level Detected",
+        "intro": "Immediate Actions Needed:",
+        "features": {
+            "SleepHours": "🛌 <strong>Prioritize Sleep:</strong> Aim for 7-9 hours of quality sleep each night",
+            "ScreenTime": "📱 <strong>Reduce Screen Time:</strong> Limit recreational screen time, especially 2 hours before bed",
+            "SocialSupport": "👥 <strong>Seek Support:</strong> Talk to friends, family, or consider speaking with a counselor",
+            "StudyHours": "📚 <strong>Study Smart:</strong> Take 15-minute breaks every hour while studying",
+            "Exercise": "🏃‍♂️ <strong>Move Your Body:</strong> Even a 10-minute walk can help reduce stress",
+        },
+        "general": [
+            "🧘‍♂️ <strong>Practice Relaxation:</strong> Try deep breathing exercises, meditation, or yoga daily",
+        ],
+        "footer": "<strong>⚠️ Important:</strong> Consider speaking with a mental health professional if stress persists or interferes with daily activities.",
+    },
+    "Medium": {
+        "title": "⚖️ Moderate Stress Level",
+        "intro": "Areas for Improvement:",
+        "features": {
+            "SleepHours": "💤 <strong>Sleep Optimization:</strong> Maintain a consistent sleep schedule and create a relaxing bedtime routine",
+            "Exercise": "🏃‍♂️ <strong>Increase Physical Activity:</strong> Add 2-3 more exercise sessions per week",
+            "StudyHours": "⏱️ <strong>Time Management:</strong> Use techniques like the Pomodoro method for better study-life balance",
+            "ScreenTime": "📱 <strong>Digital Wellness:</strong> Set specific hours for screen time and stick to them",
+            "SocialSupport": "🤝 <strong>Social Connection:</strong> Schedule regular time with supportive friends and family",
+        },
+        "general": [
+            "🎯 <strong>Set Priorities:</strong> Focus on what's most important and let go of perfectionism",
+        ],
+        "footer": "<strong>💡 Tip:</strong> You're on the right track! Small, consistent changes can make a big difference.",
+    },
+    "Low": {
+        "title": "✅ Low Stress Level - Excellent Work!",
+        "intro": "Keep up the great habits:",
+        "features": {},
+        "general": [
+            "🎯 <strong>Maintain Balance:</strong> Continue your healthy lifestyle patterns",
+            "💪 <strong>Build Resilience:</strong> Develop additional coping strategies for future challenges",
+            "📈 <strong>Monitor Changes:</strong> Stay aware of your stress levels as circumstances change",
+            "🤝 <strong>Support Others:</strong> Share your healthy habits and strategies with friends",
+            "🎉 <strong>Celebrate Success:</strong> Acknowledge and reward yourself for maintaining good mental health",
+            "🧠 <strong>Keep Learning:</strong> Continue exploring stress management and wellness techniques",
+        ],
+        "footer": "<strong>🌟 Great job!</strong> You're a role model for healthy student life balance.",
+    },
+}
+
+# Always show at least this many habit bullets, even if few features push stress up
+MIN_FEATURE_BULLETS = 2
+
+
+def ordered_bullets(stress_label, stress_contributions=None):
+    spec = RECOMMENDATIONS[stress_label]
+    features = list(spec["features"])
+    if stress_contributions is not None:
+        push = {name: stress_contributions[FEATURE_NAMES.index(name)] for name in features}
+        features.sort(key=lambda name: push[name], reverse=True)
+        raising = [name for name in features if push[name] > 0]
+        features = raising if len(raising) >= MIN_FEATURE_BULLETS else features[: max(MIN_FEATURE_BULLETS, len(raising))]
+    return [spec["features"][name] for name in features] + spec["general"]
+
+
+def render(stress_label, stress_contributions=None):
+    spec = RECOMMENDATIONS[stress_label]
+    items = "\n".join(f"    <li>{bullet}</li>" for bullet in ordered_bullets(stress_label, stress_contributions))
+    return f"""
+<div class="recommendation-box">
+<h4>{spec["title"]}</h4>
+<p><strong>{spec["intro"]}</strong></p>
+<ul>
+{items}
+</ul>
+<p>{spec["footer"]}</p>
+</div>
+"""
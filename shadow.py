@@ -0,0 +1,231 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from calibration import CALIBRATION_PATH, fit_for_model, labels_and_scores, save_calibrator
+from latency import LatencyRecorder
+from model_registry import ModelRegistry
+from stress_model import CLASS_NAMES
+
+logger = logging.getLogger(__name__)
+
+STATUS_PATH = "shadow_status.json"
+PRIMARY = "primary"
+
+# A/B routing resolution: sessions are spread over this many slots, so percentages can have two decimals
+AB_SLOTS = 10_000
+
+
+def parse_candidates(spec):
+    # "name=path,path2": a name defaults to the file name without its extension
+    candidates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, path = entry.rpartition("=")
+        candidates[name or os.path.splitext(os.path.basename(path))[0]] = path
+    return candidates
+
+
+def ab_slot(session_id, salt=""):
+    # Stable across processes and restarts, unlike hash()
+    digest = hashlib.sha256(f"{salt}:{session_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % AB_SLOTS
+
+
+def calibration_path(model_path):
+    # Each candidate gets its own calibration map, next to its artifact
+    return f"{os.path.splitext(model_path)[0]}.calibration.json"
+
+
+def served_labels(served, proba):
+    # Decoded the way the version is served: calibrated argmax, with its own label encoder
+    return served.label_encoder.inverse_transform(served.model.classes_[labels_and_scores(proba, served.calibrator)[0]])
+
+
+def fit_calibration(model_path, path):
+    from stress_model import load_bundle
+    from train import DATA_PATH
+
+    save_calibrator(fit_for_model(load_bundle(model_path)["model"], DATA_PATH), path)
+
+
+class ShadowScorer:
+    # Candidate models scored on live traffic next to the one that answered. Callers only hand over the
+    # features and the answer; a small thread pool scores the other models and counts agreement, the
+    # confusion against the primary, and per-model latency. When the pool is `max_pending` batches behind,
+    # new batches are dropped and counted rather than queued.
+
+    def __init__(self, candidates=None, ab_model=None, ab_percent=0.0, salt="", status_path=STATUS_PATH,
+                 max_workers=1, max_pending=64, write_seconds=30.0):
+        self.registries = {
+            name: ModelRegistry(path, forest_path=None, table_path=None, attributions_path=None, calibration_path=calibration_path(path))
+            for name, path in (candidates or {}).items()
+        }
+        if ab_model is not None and ab_model not in self.registries:
+            logger.warning("A/B model %r is not a shadow candidate; A/B routing is off", ab_model)
+            ab_model = None
+        self.ab_model = ab_model
+        self.ab_percent = ab_percent
+        self.salt = salt
+        self.status_path = status_path
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.write_seconds = write_seconds
+        self.latency = LatencyRecorder()
+        # Rows are the primary's answer, columns the candidate's, in CLASS_NAMES order
+        self.confusion = {name: np.zeros((len(CLASS_NAMES), len(CLASS_NAMES)), dtype=np.int64) for name in self.registries}
+        # What each A/B arm actually answered
+        self.answered = {}
+        self.submitted = 0
+        self.dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._loader = None
+        self._last_write = time.monotonic()
+
+    def route(self, session_id):
+        # The same session always gets the same arm; the share of sessions on the candidate is `ab_percent`
+        if self.ab_model is None or ab_slot(session_id, self.salt) >= self.ab_percent * AB_SLOTS / 100:
+            return PRIMARY
+        return self.ab_model
+
+    def start(self):
+        # Candidates load on a background thread, so no request waits for them; until one has loaded (or if it
+        # fails validation) served() returns None and its sessions stay on the primary
+        with self._lock:
+            if self._loader is not None or not self.registries:
+                return self
+            self._loader = threading.Thread(target=self._load_candidates, name="shadow-load", daemon=True)
+        self._loader.start()
+        return self
+
+    def _load_candidates(self):
+        for name, registry in self.registries.items():
+            if os.path.exists(CALIBRATION_PATH) and not os.path.exists(registry.calibration_path):
+                # The primary's map was fitted to the primary's probabilities; a candidate gets one fitted to its own
+                # the first time it is seen, so its scores are calibrated like the primary's
+                try:
+                    fit_calibration(registry.model_path, registry.calibration_path)
+                except Exception:
+                    logger.exception("Could not calibrate shadow candidate %s; its scores stay uncalibrated", name)
+            registry.start()
+
+    def served(self, name):
+        # The candidate's current validated version; None before start() has loaded it or if it failed validation
+        return self.registries[name].current()
+
+    def submit(self, features, labels, answered_by=PRIMARY, primary=None, elapsed_ms=None):
+        # Never blocks: the batch is either handed to the pool or dropped. `primary` is the primary's
+        # ModelVersion, scored in the background when a candidate answered
+        if not self.registries:
+            return False
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += len(labels)
+                return False
+            self._pending += 1
+            self.submitted += len(labels)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="shadow")
+        self._executor.submit(self._score, np.asarray(features, dtype=np.float64), np.asarray(labels), answered_by, primary, elapsed_ms)
+        return True
+
+    def flush(self):
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+
+    def _score(self, features, labels, answered_by, primary, elapsed_ms):
+        try:
+            if elapsed_ms is not None:
+                self.latency.observe(answered_by, elapsed_ms)
+            versions = {} if answered_by == PRIMARY or primary is None else {PRIMARY: primary}
+            for name in self.registries:
+                if name != answered_by:
+                    served = self.served(name)
+                    if served is not None:
+                        versions[name] = served
+            predicted = {answered_by: labels}
+            for name, served in versions.items():
+                start = time.perf_counter()
+                proba = served.model.predict_proba(features)
+                self.latency.observe(name, (time.perf_counter() - start) * 1000)
+                predicted[name] = served_labels(served, proba)
+
+            with self._lock:
+                arm = self.answered.setdefault(answered_by, np.zeros(len(CLASS_NAMES), dtype=np.int64))
+                arm += np.bincount(np.searchsorted(CLASS_NAMES, labels), minlength=len(CLASS_NAMES))
+                reference = predicted.get(PRIMARY)
+                if reference is not None:
+                    rows = np.searchsorted(CLASS_NAMES, reference)
+                    for name in self.confusion:
+                        if name in predicted:
+                            np.add.at(self.confusion[name], (rows, np.searchsorted(CLASS_NAMES, predicted[name])), 1)
+            self.maybe_write()
+        except Exception:
+            logger.exception("Shadow scoring failed")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def snapshot(self):
+        latency = self.latency.snapshot()["stages"]
+        with self._lock:
+            models = {}
+            for name, confusion in self.confusion.items():
+                compared = int(confusion.sum())
+                models[name] = {
+                    "compared": compared,
+                    "agreement": float(np.trace(confusion) / compared) if compared else None,
+                    "confusion": {primary: dict(zip(CLASS_NAMES, row.tolist())) for primary, row in zip(CLASS_NAMES, confusion)},
+                    "latency": latency.get(name),
+                }
+            answered = {arm: dict(zip(CLASS_NAMES, counts.tolist())) for arm, counts in self.answered.items()}
+            return {
+                "written_at": time.time(),
+                "pid": os.getpid(),
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "ab": {"model": self.ab_model, "percent": self.ab_percent if self.ab_model else 0.0},
+                "primary_latency": latency.get(PRIMARY),
+                "models": models,
+                "answered": answered,
+            }
+
+    def write(self):
+        status = self.snapshot()
+        for name, model in status["models"].items():
+            if model["compared"]:
+                logger.info("Shadow %s: %.1f%% agreement with the primary over %d predictions, p50 %s ms", name,
+                            model["agreement"] * 100, model["compared"], model["latency"] and model["latency"]["p50_ms"])
+        if status["dropped"]:
+            logger.warning("Shadow scoring dropped %d of %d predictions to keep up", status["dropped"], status["submitted"] + status["dropped"])
+        if self.status_path:
+            # Per-process temporary name: several workers share the status file
+            tmp_path = f"{self.status_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(status, f, indent=2)
+            os.replace(tmp_path, self.status_path)
+        return status
+
+    def maybe_write(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_write < self.write_seconds:
+                return
+            self._last_write = now
+        self.write()
+
+
+SHADOW = ShadowScorer(
+    parse_candidates(os.environ.get("SHADOW_MODELS", "")),
+    ab_model=os.environ.get("AB_MODEL") or None,
+    ab_percent=float(os.environ.get("AB_PERCENT", 0)),
+    salt=os.environ.get("AB_SALT", ""),
+    status_path=os.environ.get("SHADOW_STATUS_PATH", STATUS_PATH),
+)
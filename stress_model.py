@@ -0,0 +1,73 @@
+import os
+import pickle
+
+import numpy as np
+
+# Feature order lives in the schema
+from feature_schema import FEATURE_NAMES
+
+MODEL_PATH = "student_stress_model.pkl"
+
+# Encoded class order, as produced by sklearn's LabelEncoder fitted on the stress levels
+CLASS_NAMES = ("High", "Low", "Medium")
+
+
+def load_model(path=MODEL_PATH, use_mmap=True):
+    return load_classifier(path, use_mmap)[0]
+
+
+def load_classifier(path=MODEL_PATH, use_mmap=True):
+    # The model and the label encoder it was trained with. A .forest file is exported by flat_forest.py,
+    # needs only NumPy and stores the class names itself.
+    if path.endswith(".forest"):
+        from flat_forest import FlatForest
+
+        model = FlatForest.load(path, use_mmap)
+        # Exports written before the names were stored use the standard encoding
+        return model, create_label_encoder(model.class_names)
+    bundle = load_bundle(path)
+    return bundle["model"], bundle["label_encoder"]
+
+
+def load_bundle(path=MODEL_PATH):
+    # Artifacts from train.py bundle the model with its label encoder, feature order and metadata;
+    # a bare pickled estimator is wrapped the same way
+    with open(path, "rb") as f:
+        artifact = pickle.load(f)
+    if not (isinstance(artifact, dict) and "model" in artifact):
+        artifact = {"model": artifact, "label_encoder": create_label_encoder(), "feature_names": FEATURE_NAMES, "metadata": {}}
+    if tuple(artifact["feature_names"]) != FEATURE_NAMES:
+        raise ValueError(f"{path} was trained on features {artifact['feature_names']}, expected {FEATURE_NAMES}")
+    return artifact
+
+
+def save_bundle(bundle, path):
+    # Write beside the target and rename, so readers never see a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+class StressLabelEncoder:
+    # Same mapping as LabelEncoder().fit(["High", "Medium", "Low"]) without importing scikit-learn
+
+    classes_ = np.array(CLASS_NAMES)
+
+    def __init__(self, classes=None):
+        if classes is not None:
+            self.classes_ = np.asarray(classes)
+
+    def transform(self, labels):
+        labels = np.asarray(labels)
+        unknown = np.setdiff1d(labels, self.classes_)
+        if unknown.size:
+            raise ValueError(f"y contains previously unseen labels: {unknown.tolist()}")
+        return np.searchsorted(self.classes_, labels)
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.intp)]
+
+
+def create_label_encoder(classes=None):
+    return StressLabelEncoder(classes)
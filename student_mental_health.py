@@ -1,31 +1,62 @@
 import streamlit as st
-import pickle
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
+import hashlib
+import os
+import re
+import secrets
+import time
 from datetime import datetime
+import attributions
+import calibration
+import feature_schema
+import flat_forest
+import prediction_table
+import recommendations
+import stress_model
+from drift import DRIFT
+from history import HISTORY
+from model_registry import ModelRegistry
+from latency import RECORDER, min_spinner_seconds
+from prediction_cache import PREDICTION_CACHE, CachedPrediction
+from shadow import PRIMARY, SHADOW
+from tenants import TENANT_POOL
 
-# Load model
-@st.cache_data
-def load_model():
-    try:
-        with open("student_stress_model.pkl", "rb") as f:
-            model = pickle.load(f)
-        return model
-    except FileNotFoundError:
-        st.error("Model file not found. Please ensure 'student_stress_model.pkl' is in the same directory.")
-        return None
+# Model artifacts are loaded on first use so the page can render before they are needed.
+# One registry per process holds the served model, preferring the flat NumPy export and the
+# precomputed table when they exist. The export is memory-mapped read-only, so worker processes
+# share its pages (STRESS_MODEL_MMAP=0 to copy). A background thread watches the files and swaps
+# in new versions once they pass validation, so deploys need no restart.
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry(use_mmap=os.environ.get("STRESS_MODEL_MMAP", "1") != "0").start()
+
+# Shadow and A/B candidates load on a background thread from the first page load on, never on a session's run;
+# after the first call this is a no-op
+SHADOW.start()
+
+# The version this session is answered by: an institution's own model for ?tenant=<name> links, else the
+# primary or the A/B candidate for sessions routed to it (AB_MODEL, AB_PERCENT). A candidate that is not
+# loaded or failed validation leaves the session on the primary. Tenant sessions have no primary to compare with.
+def session_model():
+    tenant = st.query_params.get("tenant")
+    if tenant:
+        try:
+            return f"tenant:{tenant}", TENANT_POOL.get(tenant), None
+        except (KeyError, ValueError):
+            return f"tenant:{tenant}", None, None
+    primary = get_model_registry().current()
+    arm = SHADOW.route(st.session_state.history_user)
+    if arm != PRIMARY:
+        candidate = SHADOW.served(arm)
+        if candidate is not None:
+            return arm, candidate, primary
+    return PRIMARY, primary, primary
 
-# Recreate the label encoder manually
-from sklearn.preprocessing import LabelEncoder
-@st.cache_data
-def create_label_encoder():
-    le = LabelEncoder()
-    le.fit(["High", "Medium", "Low"])
-    return le
+# What-if results depend only on the served model version and the inputs
+@st.cache_data(max_entries=1024, show_spinner=False)
+def run_what_if(_served, version, features):
+    import what_if
+    return what_if.analyze(_served.model, _served.table, features, _served.calibrator, _served.severity)
 
-model = load_model()
-le = create_label_encoder()
 
 # Page configuration
 st.set_page_config(
@@ -197,7 +228,7 @@ st.markdown("""
 
     
     /* Enhanced button styling */
-    .stButton > button {
+    .stButton > button, .stFormSubmitButton > button {
         width: 100%;
         height: 3.5rem;
         font-size: 18px;
@@ -211,7 +242,7 @@ st.markdown("""
         letter-spacing: 0.5px;
     }
     
-    .stButton > button:hover {
+    .stButton > button:hover, .stFormSubmitButton > button:hover {
         transform: translateY(-3px);
         box-shadow: 0 15px 40px rgba(102, 126, 234, 0.4);
         background: linear-gradient(135deg, #5a67d8 0%, #6b46c1 100%);
@@ -307,6 +338,41 @@ st.markdown("""
     .stSpinner {
         text-align: center;
     }
+
+    /* Minimum-time analysis overlay, hidden by the browser once its delay elapses */
+    .analysis-overlay {
+        position: fixed;
+        inset: 0;
+        z-index: 1000;
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        justify-content: center;
+        background: rgba(255, 255, 255, 0.85);
+        animation: overlay-hide 0.3s ease forwards;
+    }
+    
+    .analysis-overlay p {
+        color: #2d3748 !important;
+        font-weight: 600;
+    }
+    
+    .analysis-overlay-spinner {
+        width: 48px;
+        height: 48px;
+        border: 5px solid #e2e8f0;
+        border-top-color: #667eea;
+        border-radius: 50%;
+        animation: overlay-spin 0.8s linear infinite;
+    }
+    
+    @keyframes overlay-spin {
+        to { transform: rotate(360deg); }
+    }
+    
+    @keyframes overlay-hide {
+        to { opacity: 0; visibility: hidden; }
+    }
     
     /* Divider styling */
     hr {
@@ -393,52 +459,54 @@ st.sidebar.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
-# Main content area
-col1, col2 = st.columns([2, 1])
-with col1:
-    st.markdown('<h2 class="section-header">📊 Personal Information</h2>', unsafe_allow_html=True)
-    
-    # --- Combine all inputs in a single column ---
-    age = st.number_input(
-        "What's your age?", 
-        min_value=17, 
-        max_value=25, 
-        value=20,
-        help="Your current age (between 17-25 years)"
-    )
+# Only the sidebar history code, the metrics, the results and the what-if explorer ever rerun after the first run.
+# Everything else on this page (CSS, header, guide, footer) is sent once per session, on the full-app run
+# when the page loads, because no widget outside a fragment or the input form is left to trigger another one.
+# History is keyed on a random code, never on anything a classmate could guess. It rides in the ?history= query
+# parameter so a bookmark resumes it, and is shown in the sidebar to carry to another device. Only its hash is stored.
+HISTORY_CODE = re.compile(r"[A-Za-z0-9_-]{16,64}")
 
-    social_support = st.radio(
-        "Do you have reliable social support? (family, friends, counselors)",
-        ["Yes", "No"],
-        help="Social support includes having people you can talk to about your problems"
-    )
+def use_history_code(code):
+    st.session_state.history_active = st.session_state.history_code = code
+    st.session_state.history_user = hashlib.sha256(code.encode()).hexdigest()
+    st.query_params["history"] = code
 
-    sleep = st.slider(
-        "💤 Sleep Hours (per day)", 
-        1, 10, 7,
-        help="Average hours of sleep you get per night"
-    )
+if "history_active" not in st.session_state:
+    code = st.query_params.get("history", "")
+    use_history_code(code if HISTORY_CODE.fullmatch(code) else secrets.token_urlsafe(16))
 
-    study = st.slider(
-        "📚 Study Hours (per day)", 
-        1, 10, 4,
-        help="Hours spent studying or doing academic work daily"
-    )
+def change_history_code():
+    code = st.session_state.history_code.strip()
+    st.session_state.history_code_rejected = not HISTORY_CODE.fullmatch(code)
+    use_history_code(st.session_state.history_active if st.session_state.history_code_rejected else code)
 
-    screen = st.slider(
-        "📱 Screen Time (hours per day)", 
-        1, 12, 6,
-        help="Total time spent on phones, computers, TV, etc."
+@st.fragment
+def history_settings():
+    st.markdown('<h2 class="section-header">📈 Your History</h2>', unsafe_allow_html=True)
+    st.text_input(
+        "History code",
+        key="history_code",
+        on_change=change_history_code,
+        help="Your private key to your stress trend. Keep it (or bookmark this page) and paste it here on a later visit or another device. Anyone who has the code can see that trend."
     )
+    if st.session_state.pop("history_code_rejected", False):
+        st.warning("That is not a history code; codes are at least 16 letters, digits, - or _.")
 
-    exercise = st.slider(
-        "🏃‍♂️ Exercise (times per week)", 
-        0, 7, 2,
-        help="Number of times you engage in physical exercise per week"
-    )
+with st.sidebar:
+    history_settings()
 
+def current_inputs():
+    state = st.session_state
+    return state.age, state.sleep, state.study, state.screen, state.exercise, state.social_support
 
-with col2:
+# The submit button reruns just these fragments; the form's own widgets already show the new values in the browser
+def request_analysis():
+    st.session_state.analysis_requested = True
+    st.rerun(["metrics", "results", "what_if"])
+
+@st.fragment(key="metrics")
+def health_metrics():
+    age, sleep, study, screen, exercise, social_support = current_inputs()
     st.markdown('<h2 class="section-header">📈 Your Health Metrics</h2>', unsafe_allow_html=True)
     
     # Display current inputs as metrics
@@ -448,175 +516,247 @@ with col2:
     st.metric("Study-Life Balance", "Balanced ⚖️" if study <= 6 else "High Study Load 📚")
     st.metric("Screen Time", "Moderate 📱" if screen <= 8 else "High ⚠️")
     st.metric("Exercise Level", "Active 💪" if exercise >= 3 else "Low Activity 🚶‍♂️")
+
+def schema_bounds(name):
+    # Widget limits come from the schema the model and the API validate against
+    feature = feature_schema.feature_by_name(name)
+    return feature.low, feature.high
+
+# Main content area
+col1, col2 = st.columns([2, 1])
+with col1:
+    st.markdown('<h2 class="section-header">📊 Personal Information</h2>', unsafe_allow_html=True)
     
+    # --- Combine all inputs in a single form; nothing reruns until it is submitted ---
+    with st.form("health_inputs", border=False):
+        age_low, age_high = schema_bounds("Age")
+        st.number_input(
+            "What's your age?", 
+            min_value=age_low, 
+            max_value=age_high, 
+            value=20,
+            key="age",
+            help=f"Your current age (between {age_low}-{age_high} years)"
+        )
 
-# Prediction section
-st.markdown("---")
-st.markdown('<h2 class="section-header">🔮 Stress Level Prediction</h2>', unsafe_allow_html=True)
+        st.radio(
+            "Do you have reliable social support? (family, friends, counselors)",
+            ["Yes", "No"],
+            key="social_support",
+            help="Social support includes having people you can talk to about your problems"
+        )
+
+        st.slider(
+            "💤 Sleep Hours (per day)", 
+            *schema_bounds("SleepHours"), 7,
+            key="sleep",
+            help="Average hours of sleep you get per night"
+        )
+
+        st.slider(
+            "📚 Study Hours (per day)", 
+            *schema_bounds("StudyHours"), 4,
+            key="study",
+            help="Hours spent studying or doing academic work daily"
+        )
+
+        st.slider(
+            "📱 Screen Time (hours per day)", 
+            *schema_bounds("ScreenTime"), 6,
+            key="screen",
+            help="Total time spent on phones, computers, TV, etc."
+        )
 
-if model is not None:
+        st.slider(
+            "🏃‍♂️ Exercise (times per week)", 
+            *schema_bounds("Exercise"), 2,
+            key="exercise",
+            help="Number of times you engage in physical exercise per week"
+        )
+
+        st.form_submit_button("🔍 Analyze My Mental Health", on_click=request_analysis)
+
+with col2:
+    health_metrics()
+
+model_available = bool(st.query_params.get("tenant")) or os.path.exists(flat_forest.FOREST_PATH) or os.path.exists(stress_model.MODEL_PATH)
+
+@st.fragment(key="results")
+def prediction_results():
+    # Results appear on the rerun that follows a submit and stay up while the what-if explorer reruns
+    if not st.session_state.pop("analysis_requested", False):
+        return
+    if not model_available:
+        st.error("Model file not found. Please ensure 'student_stress_model.pkl' is in the same directory.")
+        return
+    age, sleep, study, screen, exercise, social_support = current_inputs()
     # Convert social support to numeric
-    social_support_val = 1 if social_support == "Yes" else 0
+    social_support_val = int(feature_schema.encode_value(feature_schema.feature_by_name("SocialSupport"), social_support))
+    history_user = st.session_state.history_user
     
-    if st.button("🔍 Analyze My Mental Health"):
-        with st.spinner("Analyzing your data..."):
-            # Add a small delay for better UX
-            import time
-            time.sleep(1)
-            
-            features = np.array([[age, sleep, study, screen, exercise, social_support_val]])
-            prediction = model.predict(features)[0]
-            stress_label = le.inverse_transform([prediction])[0]
-            
-            # Create visualization
-            col1, col2, col3 = st.columns([1, 2, 1])
-            
-            with col2:
-                # Stress level gauge
-                if stress_label == "High":
-                    color = "#ff4757"
-                    emoji = "🔴"
-                    score = 85
-                elif stress_label == "Medium":
-                    color = "#ffa502"
-                    emoji = "🟡"
-                    score = 50
+    analysis_start = time.perf_counter()
+    with st.spinner("Analyzing your data..."):
+        import figures
+        
+        # Identical inputs reuse the stored prediction and pre-rendered figures
+        # Pin one model version for the whole analysis; a concurrent swap only affects later runs
+        arm, served, primary = session_model()
+        if served is None:
+            st.error("The model could not be loaded or failed validation. Please check the server logs.")
+            return
+        cache_key = ((arm, served.version), age, sleep, study, screen, exercise, social_support_val)
+        cached = PREDICTION_CACHE.get(cache_key)
+        predict_ms = None
+        if cached is None:
+            with RECORDER.time("features"):
+                features = feature_schema.encode_row((age, sleep, study, screen, exercise, social_support_val))
+            predict_start = time.perf_counter()
+            with RECORDER.time("predict"):
+                table = served.table
+                if table is not None and prediction_table.in_grid(features[0]):
+                    prediction, proba, score = prediction_table.lookup(table, features[0])
                 else:
-                    color = "#2ed573"
-                    emoji = "🟢"
-                    score = 15
-                
-                fig = go.Figure(go.Indicator(
-                    mode = "gauge+number+delta",
-                    value = score,
-                    domain = {'x': [0, 1], 'y': [0, 1]},
-                    title = {'text': "Stress Level", 'font': {'size': 20, 'color': '#2d3748'}},
-                    gauge = {
-                        'axis': {'range': [None, 100], 'tickcolor': '#4a5568'},
-                        'bar': {'color': color, 'thickness': 0.8},
-                        'steps': [
-                            {'range': [0, 30], 'color': "#e6ffed"},
-                            {'range': [30, 70], 'color': "#fff3cd"},
-                            {'range': [70, 100], 'color': "#ffe6e6"}
-                        ],
-                        'threshold': {
-                            'line': {'color': color, 'width': 4},
-                            'thickness': 0.75,
-                            'value': score
-                        }
-                    }
-                ))
-                fig.update_layout(
-                    height=300,
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font={'color': '#2d3748'}
+                    model = served.model
+                    proba = model.predict_proba(features)[0]
+                    column, score = calibration.labels_and_scores(proba, served.calibrator, served.severity)
+                    prediction, score = model.classes_[column], float(score)
+            predict_ms = (time.perf_counter() - predict_start) * 1000
+            with RECORDER.time("inverse_transform"):
+                stress_label = served.label_encoder.inverse_transform([prediction])[0]
+            with RECORDER.time("attributions"):
+                # In the same calibrated points as the gauge, so the bars add up to its distance from the baseline
+                contributions = attributions.stress_contributions(
+                    attributions.explain(served.explainer, served.attributions, features[0]),
+                    attributions.baseline(served.explainer),
+                    served.calibrator,
+                    served.severity,
                 )
-                st.plotly_chart(fig, use_container_width=True)
             
-            st.markdown(f'<h3 style="text-align: center; color: #2d3748;">{emoji} Predicted Stress Level: <span style="color: {color}; font-weight: 700;">{stress_label}</span></h3>', unsafe_allow_html=True)
-            
-            # Recommendations based on prediction
-            st.markdown('<h2 class="section-header">💡 Personalized Recommendations</h2>', unsafe_allow_html=True)
-            
-            if stress_label == "High":
-                st.markdown("""
-                <div class="recommendation-box">
-                <h4>🚨 High Stress Level Detected</h4>
-                <p><strong>Immediate Actions Needed:</strong></p>
-                <ul>
-                    <li>🛌 <strong>Prioritize Sleep:</strong> Aim for 7-9 hours of quality sleep each night</li>
-                    <li>📱 <strong>Reduce Screen Time:</strong> Limit recreational screen time, especially 2 hours before bed</li>
-                    <li>🧘‍♂️ <strong>Practice Relaxation:</strong> Try deep breathing exercises, meditation, or yoga daily</li>
-                    <li>👥 <strong>Seek Support:</strong> Talk to friends, family, or consider speaking with a counselor</li>
-                    <li>📚 <strong>Study Smart:</strong> Take 15-minute breaks every hour while studying</li>
-                    <li>🏃‍♂️ <strong>Move Your Body:</strong> Even a 10-minute walk can help reduce stress</li>
-                </ul>
-                <p><strong>⚠️ Important:</strong> Consider speaking with a mental health professional if stress persists or interferes with daily activities.</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            elif stress_label == "Medium":
-                st.markdown("""
-                <div class="recommendation-box">
-                <h4>⚖️ Moderate Stress Level</h4>
-                <p><strong>Areas for Improvement:</strong></p>
-                <ul>
-                    <li>💤 <strong>Sleep Optimization:</strong> Maintain a consistent sleep schedule and create a relaxing bedtime routine</li>
-                    <li>🏃‍♂️ <strong>Increase Physical Activity:</strong> Add 2-3 more exercise sessions per week</li>
-                    <li>⏱️ <strong>Time Management:</strong> Use techniques like the Pomodoro method for better study-life balance</li>
-                    <li>📱 <strong>Digital Wellness:</strong> Set specific hours for screen time and stick to them</li>
-                    <li>🤝 <strong>Social Connection:</strong> Schedule regular time with supportive friends and family</li>
-                    <li>🎯 <strong>Set Priorities:</strong> Focus on what's most important and let go of perfectionism</li>
-                </ul>
-                <p><strong>💡 Tip:</strong> You're on the right track! Small, consistent changes can make a big difference.</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            else:
-                st.markdown("""
-                <div class="recommendation-box">
-                <h4>✅ Low Stress Level - Excellent Work!</h4>
-                <p><strong>Keep up the great habits:</strong></p>
-                <ul>
-                    <li>🎯 <strong>Maintain Balance:</strong> Continue your healthy lifestyle patterns</li>
-                    <li>💪 <strong>Build Resilience:</strong> Develop additional coping strategies for future challenges</li>
-                    <li>📈 <strong>Monitor Changes:</strong> Stay aware of your stress levels as circumstances change</li>
-                    <li>🤝 <strong>Support Others:</strong> Share your healthy habits and strategies with friends</li>
-                    <li>🎉 <strong>Celebrate Success:</strong> Acknowledge and reward yourself for maintaining good mental health</li>
-                    <li>🧠 <strong>Keep Learning:</strong> Continue exploring stress management and wellness techniques</li>
-                </ul>
-                <p><strong>🌟 Great job!</strong> You're a role model for healthy student life balance.</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Lifestyle Analysis Chart
-            st.markdown('<h3 class="section-header">📊 Your Lifestyle Analysis</h3>', unsafe_allow_html=True)
-            
-            categories = ['Sleep Quality', 'Study Balance', 'Screen Time', 'Exercise', 'Social Support']
+            with RECORDER.time("gauge_figure"):
+                gauge_json = figures.gauge_json(stress_label, score)
+            with RECORDER.time("radar_figure"):
+                radar_json = figures.radar_json(
+                    figures.lifestyle_scores(sleep, study, screen, exercise, social_support_val)
+                )
+            with RECORDER.time("drivers_figure"):
+                drivers_json = figures.drivers_json(contributions)
+            cached = CachedPrediction(stress_label, proba, score, contributions, gauge_json, radar_json, drivers_json)
+            PREDICTION_CACHE.put(cache_key, cached)
+        
+        stress_label = cached.label
+        color, emoji = figures.STRESS_STYLES[stress_label]
+        
+        # Read the earlier points first; the new one is queued for the background writer and drawn from memory
+        with RECORDER.time("history"):
+            past = HISTORY.trend(history_user)
+            recorded_at = time.time()
+            HISTORY.record(history_user, cache_key[1:], stress_label, cached.proba, cached.score, recorded_at)
+        if arm == PRIMARY:
+            # Input and prediction-mix drift counters, updated off the script thread. They track the primary, so
+            # sessions answered by an A/B candidate or a tenant model are left out; routing is by hashed session,
+            # so the rest is still a fair sample of the inputs
+            DRIFT.record(cache_key[1:], stress_label, recorded_at)
+        if primary is not None:
+            # Shadow candidates score the same inputs on their own threads; a busy pool drops it instead of waiting
+            SHADOW.submit([cache_key[1:]], [stress_label], arm, primary, predict_ms)
+        
+        # Create visualization
+        col1, col2, col3 = st.columns([1, 2, 1])
+        
+        with col2:
+            # Stress level gauge
+            st.plotly_chart(figures.figure_from_json(cached.gauge_json), use_container_width=True)
+        
+        st.markdown(f'<h3 style="text-align: center; color: #2d3748;">{emoji} Predicted Stress Level: <span style="color: {color}; font-weight: 700;">{stress_label}</span></h3>', unsafe_allow_html=True)
+        
+        # Recommendations based on prediction
+        st.markdown('<h2 class="section-header">💡 Personalized Recommendations</h2>', unsafe_allow_html=True)
+        
+        # Habit bullets are picked and ordered by how much each input pushed this prediction up
+        with RECORDER.time("recommendations"):
+            st.markdown(recommendations.render(stress_label, cached.contributions), unsafe_allow_html=True)
+        
+        st.plotly_chart(figures.figure_from_json(cached.drivers_json), use_container_width=True)
+        
+        # Lifestyle Analysis Chart
+        st.markdown('<h3 class="section-header">📊 Your Lifestyle Analysis</h3>', unsafe_allow_html=True)
+        st.plotly_chart(figures.figure_from_json(cached.radar_json), use_container_width=True)
+        
+        if past:
+            times = [datetime.fromtimestamp(entry.created_at) for entry in past] + [datetime.fromtimestamp(recorded_at)]
+            # Rows saved before scores were stored fall back to the uncalibrated score
             scores = [
-                min(sleep / 8 * 100, 100),  # Sleep score
-                max(0, 100 - (study - 4) * 15),  # Study balance (optimal around 4-5 hours)
-                max(0, 100 - (screen - 4) * 10),  # Screen time (lower is better)
-                min(exercise / 4 * 100, 100),  # Exercise score
-                social_support_val * 100  # Social support
-            ]
-            
-            fig_radar = go.Figure()
-            fig_radar.add_trace(go.Scatterpolar(
-                r=scores,
-                theta=categories,
-                fill='toself',
-                name='Your Profile',
-                line_color='#667eea',
-                fillcolor='rgba(102, 126, 234, 0.2)'
-            ))
-            
-            fig_radar.update_layout(
-                polar=dict(
-                    radialaxis=dict(
-                        visible=True,
-                        range=[0, 100],
-                        tickfont={'color': '#4a5568'},
-                        gridcolor='#e2e8f0'
-                    ),
-                    angularaxis=dict(
-                        tickfont={'color': '#2d3748'}
-                    )
-                ),
-                showlegend=True,
-                title={
-                    'text': "Personal Wellness Profile",
-                    'x': 0.5,
-                    'font': {'size': 20, 'color': '#2d3748'}
-                },
-                height=500,
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font={'color': '#2d3748'}
+                entry.score if entry.score is not None else float(calibration.stress_scores(entry.proba, severity=served.severity)) for entry in past
+            ] + [cached.score]
+            labels = [entry.label for entry in past] + [stress_label]
+            st.plotly_chart(figures.build_trend(times, scores, labels), use_container_width=True)
+        else:
+            st.caption("📈 Analyze again later to see your stress trend over time.")
+        
+        RECORDER.observe("total", (time.perf_counter() - analysis_start) * 1000)
+        RECORDER.maybe_write()
+        # Keep the overlay up client-side instead of sleeping on the script thread
+        remaining = min_spinner_seconds() - (time.perf_counter() - analysis_start)
+        if remaining > 0:
+            st.markdown(f'<div class="analysis-overlay" style="animation-delay: {remaining:.2f}s;"><div class="analysis-overlay-spinner"></div><p>Analyzing your data...</p></div>', unsafe_allow_html=True)
+
+@st.fragment(key="what_if")
+def what_if_explorer():
+    # Its own widgets rerun only this fragment; a submit reruns it with the new inputs. It is always drawn,
+    # even with no model, because the submit callback reruns it by key and a missing fragment is an error.
+    if not model_available:
+        return
+    st.markdown('<h2 class="section-header">🔬 What-If Explorer</h2>', unsafe_allow_html=True)
+    if st.toggle("Show how changing your habits would change your predicted stress", key="what_if_open"):
+        import figures
+        import what_if
+        
+        arm, served, _ = session_model()
+        if served is None:
+            st.error("The model could not be loaded or failed validation. Please check the server logs.")
+            return
+        age, sleep, study, screen, exercise, social_support = current_inputs()
+        social_support_val = int(feature_schema.encode_value(feature_schema.feature_by_name("SocialSupport"), social_support))
+        with RECORDER.time("what_if"):
+            features = (age, sleep, study, screen, exercise, social_support_val)
+            result = run_what_if(served, (arm, served.version), features)
+        
+        current_level = calibration.SEVERITY_NAMES[result["base_severity"]]
+        suggestions = what_if.nearest_lower_stress(result)
+        if not suggestions:
+            st.markdown(f'<div class="recommendation-box"><p>Your predicted stress level is <strong>{current_level}</strong>. No change to one or two habits lowers it further.</p></div>', unsafe_allow_html=True)
+        else:
+            items = "".join(
+                "<li>" + " and ".join(
+                    f"<strong>{what_if.FEATURE_LABELS[name]}</strong> {old} → {new}" for name, old, new in suggestion["changes"]
+                ) + f" gives <strong>{calibration.SEVERITY_NAMES[suggestion['severity']]}</strong></li>"
+                for suggestion in suggestions
             )
-            
-            st.plotly_chart(fig_radar, use_container_width=True)
+            st.markdown(f'<div class="recommendation-box"><h4>🎯 Nearest lower-stress options</h4><p>Your predicted stress level is <strong>{current_level}</strong>. The smallest changes that lower it:</p><ul>{items}</ul></div>', unsafe_allow_html=True)
+        
+        pair_col1, pair_col2 = st.columns(2)
+        labels = {what_if.FEATURE_LABELS[name]: name for name in what_if.ADJUSTABLE}
+        with pair_col1:
+            y_name = labels[st.selectbox("Rows", list(labels), index=0)]
+        with pair_col2:
+            x_options = [label for label, name in labels.items() if name != y_name]
+            x_name = labels[st.selectbox("Columns", x_options, index=x_options.index("Exercise") if "Exercise" in x_options else 0)]
+        y_values, x_values, scores, y_name, x_name = what_if.pair_grid(result, y_name, x_name)
+        current = (
+            result["features"][feature_schema.FEATURE_NAMES.index(x_name)],
+            result["features"][feature_schema.FEATURE_NAMES.index(y_name)],
+        )
+        st.plotly_chart(
+            figures.build_what_if_heatmap(x_values, y_values, scores, what_if.FEATURE_LABELS[x_name], what_if.FEATURE_LABELS[y_name], current),
+            use_container_width=True
+        )
+
+# Prediction section
+st.markdown("---")
+st.markdown('<h2 class="section-header">🔮 Stress Level Prediction</h2>', unsafe_allow_html=True)
+prediction_results()
+
+what_if_explorer()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,243 @@
+import argparse
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+import attributions
+import prediction_table
+from calibration import CALIBRATION_PATH
+from flat_forest import FOREST_PATH
+from model_registry import VALIDATION_PATH, ModelRegistry
+from stress_model import CLASS_NAMES, MODEL_PATH
+
+logger = logging.getLogger(__name__)
+
+# One directory per institution, holding the same file names as the default model next to the app
+TENANTS_DIR = "tenants"
+TENANT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+
+# One sklearn tree node: child ids, feature, threshold, impurity and sample counts
+TREE_NODE_BYTES = 64
+
+
+def resident_bytes(version):
+    # Arrays a loaded version keeps alive; memory-mapped ones are counted as if all their pages were resident
+    seen, total = set(), 0
+    for obj in (version.model, version.explainer, version.table, version.attributions):
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, np.ndarray):
+            total += obj.nbytes
+            continue
+        for tree in getattr(obj, "estimators_", ()):
+            total += tree.tree_.node_count * TREE_NODE_BYTES + tree.tree_.value.nbytes
+        total += sum(value.nbytes for value in vars(obj).values() if isinstance(value, np.ndarray))
+    return total
+
+
+def new_stats():
+    return {"hits": 0, "misses": 0, "coalesced": 0, "loads": 0, "load_failures": 0, "evictions": 0, "load_ms_total": 0.0, "last_load_ms": None, "bytes": 0}
+
+
+class ModelPool:
+    # Per-tenant model versions, loaded on first use and kept in LRU order under a memory budget.
+    # Concurrent first requests for a tenant share one load; the others wait for its result. Resident
+    # tenants are re-checked against their files every `poll_interval` seconds and reloaded when they change.
+
+    def __init__(self, root=TENANTS_DIR, memory_budget=512 * 2**20, poll_interval=2.0, min_accuracy=0.8, use_mmap=True):
+        self.root = root
+        self.memory_budget = memory_budget
+        self.poll_interval = poll_interval
+        self.min_accuracy = min_accuracy
+        self.use_mmap = use_mmap
+        self.resident = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._failed = {}
+        self._stats = {}
+
+    def path(self, tenant):
+        if not TENANT_NAME.fullmatch(tenant or "") or not os.path.isdir(os.path.join(self.root, tenant)):
+            raise KeyError(f"Unknown tenant {tenant!r}")
+        return os.path.join(self.root, tenant)
+
+    def tenants(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if TENANT_NAME.fullmatch(name) and os.path.isdir(os.path.join(self.root, name)))
+
+    def registry(self, tenant):
+        # Only the artifacts present are used; the tenant's own survey CSV, if there, validates each version
+        path = self.path(tenant)
+        return ModelRegistry(
+            os.path.join(path, MODEL_PATH),
+            forest_path=os.path.join(path, FOREST_PATH),
+            table_path=os.path.join(path, prediction_table.TABLE_PATH),
+            attributions_path=os.path.join(path, attributions.ATTRIBUTIONS_PATH),
+            calibration_path=os.path.join(path, CALIBRATION_PATH),
+            validation_path=os.path.join(path, VALIDATION_PATH),
+            # Another institution's survey rows say nothing about this tenant's model
+            fallback_path=None,
+            min_accuracy=self.min_accuracy,
+            use_mmap=self.use_mmap,
+        )
+
+    def get(self, tenant):
+        self.path(tenant)
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats.setdefault(tenant, new_stats())
+            entry = self._entries.get(tenant)
+            if entry is not None and now - entry["checked_at"] < self.poll_interval:
+                self._entries.move_to_end(tenant)
+                stats["hits"] += 1
+                return entry["version"]
+        if entry is not None and entry["registry"].signature() == entry["version"].version:
+            with self._lock:
+                entry["checked_at"] = now
+                if tenant in self._entries:
+                    self._entries.move_to_end(tenant)
+                stats["hits"] += 1
+            return entry["version"]
+
+        with self._lock:
+            future = self._loading.get(tenant)
+            leader = future is None
+            if leader:
+                future = self._loading[tenant] = Future()
+            stats["misses" if leader else "coalesced"] += 1
+        if not leader:
+            return future.result()
+        try:
+            version = self._load(tenant, entry)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(version)
+            return version
+        finally:
+            with self._lock:
+                del self._loading[tenant]
+
+    def _load(self, tenant, stale):
+        registry = stale["registry"] if stale is not None else self.registry(tenant)
+        signature = registry.signature()
+        failed = self._failed.get(tenant)
+        try:
+            if failed is not None and failed[0] == signature:
+                # Unchanged files that were rejected before are not loaded again
+                raise ValueError(failed[1])
+            start = time.perf_counter()
+            try:
+                version = registry.load_version(signature)
+                if len(version.model.classes_) != len(CLASS_NAMES):
+                    raise ValueError(f"model predicts {len(version.model.classes_)} stress levels, expected {len(CLASS_NAMES)}")
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError) as exc:
+                with self._lock:
+                    self._failed[tenant] = (signature, str(exc))
+                    self._stats[tenant]["load_failures"] += 1
+                logger.warning("Rejected model artifacts for tenant %s: %s", tenant, exc)
+                raise ValueError(str(exc)) from exc
+        except ValueError:
+            if stale is None:
+                raise
+            # A broken update keeps the version that was serving
+            with self._lock:
+                stale["checked_at"] = time.monotonic()
+            return stale["version"]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        nbytes = resident_bytes(version)
+
+        with self._lock:
+            self._failed.pop(tenant, None)
+            previous = self._entries.pop(tenant, None)
+            if previous is not None:
+                self.resident -= previous["bytes"]
+            self._entries[tenant] = {"registry": registry, "version": version, "bytes": nbytes, "checked_at": time.monotonic()}
+            self.resident += nbytes
+            stats = self._stats[tenant]
+            stats["loads"] += 1
+            stats["load_ms_total"] += elapsed_ms
+            stats["last_load_ms"] = elapsed_ms
+            stats["bytes"] = nbytes
+            # The tenant just loaded always stays, even if it alone is over budget
+            evicted = []
+            while self.resident > self.memory_budget and len(self._entries) > 1:
+                name, entry = self._entries.popitem(last=False)
+                self.resident -= entry["bytes"]
+                self._stats[name]["evictions"] += 1
+                self._stats[name]["bytes"] = 0
+                evicted.append(name)
+            resident = self.resident
+        logger.info("Loaded model for tenant %s in %.0f ms (%.1f MiB; %.1f of %.1f MiB in use)%s", tenant, elapsed_ms, nbytes / 2**20,
+                    resident / 2**20, self.memory_budget / 2**20, f", evicted {', '.join(evicted)}" if evicted else "")
+        return version
+
+    def evict(self, tenant):
+        with self._lock:
+            entry = self._entries.pop(tenant, None)
+            if entry is not None:
+                self.resident -= entry["bytes"]
+                self._stats[tenant]["evictions"] += 1
+                self._stats[tenant]["bytes"] = 0
+        return entry is not None
+
+    def stats(self):
+        with self._lock:
+            tenants = {}
+            for name, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+                tenants[name] = dict(
+                    stats,
+                    resident=name in self._entries,
+                    hit_rate=stats["hits"] / lookups if lookups else 0.0,
+                    mean_load_ms=stats["load_ms_total"] / stats["loads"] if stats["loads"] else None,
+                )
+            return {
+                "memory_budget_bytes": self.memory_budget,
+                "resident_bytes": self.resident,
+                "resident_tenants": list(self._entries),
+                "tenants": tenants,
+            }
+
+
+TENANT_POOL = ModelPool(
+    os.environ.get("TENANTS_DIR", TENANTS_DIR),
+    memory_budget=int(float(os.environ.get("TENANT_MEMORY_MB", 512)) * 2**20),
+    use_mmap=os.environ.get("STRESS_MODEL_MMAP", "1") != "0",
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load every tenant's model once and report its load time and resident size.")
+    parser.add_argument("--root", default=TENANTS_DIR)
+    parser.add_argument("--json", action="store_true", help="Print the pool statistics as JSON")
+    args = parser.parse_args()
+
+    pool = ModelPool(args.root, memory_budget=float("inf"))
+    for tenant in pool.tenants():
+        try:
+            version = pool.get(tenant)
+        except ValueError as exc:
+            print(f"{tenant:<24}rejected: {exc}")
+            continue
+        stats = pool.stats()["tenants"][tenant]
+        accuracy = "unchecked" if version.accuracy is None else f"{version.accuracy:.3f}"
+        print(f"{tenant:<24}{stats['last_load_ms']:>9.0f} ms{stats['bytes'] / 2**20:>9.1f} MiB  validation accuracy {accuracy}")
+    if args.json:
+        print(json.dumps(pool.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
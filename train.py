@@ -0,0 +1,315 @@
+import argparse
+import csv
+import hashlib
+import io
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from feature_schema import encode_columns
+from stress_model import FEATURE_NAMES, MODEL_PATH, create_label_encoder, load_bundle, save_bundle
+
+DATA_PATH = "student_mental_health.csv"
+MODELS_DIR = "models"
+TARGET = "StressLevel"
+
+PARAM_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [None, 8, 16],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", None],
+}
+
+
+def read_rows(path, offset=0):
+    # Rows from a byte offset onwards (0 = whole file) and the offset just past the last complete line,
+    # so an incremental update only reads what was appended since its checkpoint
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode()]))
+        f.seek(max(offset, f.tell()))
+        start = f.tell()
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    if not data[:end].strip():
+        return pd.DataFrame(columns=header), start + end
+    return pd.read_csv(io.BytesIO(data[:end]), names=header, header=None, dtype=str, keep_default_na=False), start + end
+
+
+def load_dataset(path=DATA_PATH, offset=0):
+    rows, end_offset = read_rows(path, offset)
+    le = create_label_encoder()
+    if rows.empty:
+        return np.empty((0, len(FEATURE_NAMES))), np.empty(0, dtype=np.intp), le, end_offset
+    return encode_columns(rows), le.transform(rows[TARGET].str.strip().to_numpy()), le, end_offset
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def search_params(X, y, cv_folds, seed, n_jobs):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold
+
+    # Parallelize across candidates and folds; each forest stays single-threaded to avoid oversubscription
+    search = GridSearchCV(
+        RandomForestClassifier(class_weight="balanced", random_state=seed, n_jobs=1),
+        PARAM_GRID,
+        cv=StratifiedKFold(cv_folds, shuffle=True, random_state=seed),
+        scoring="accuracy",
+        n_jobs=n_jobs,
+        refit=False,
+    )
+    search.fit(X, y)
+    return search.best_params_, float(search.best_score_)
+
+
+def train(X, y, params, seed, n_jobs):
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = RandomForestClassifier(class_weight="balanced", random_state=seed, n_jobs=n_jobs, **params)
+    model.fit(X, y)
+    # Serving is mostly single-row; don't spin up a worker pool per prediction
+    model.set_params(n_jobs=None)
+    return model
+
+
+def build_bundle(data_path, seed=42, cv_folds=5, test_size=0.2, n_jobs=-1, search=True):
+    import sklearn
+    from sklearn.model_selection import train_test_split
+
+    rows, end_offset = read_rows(data_path)
+    le = create_label_encoder()
+    X, y = encode_columns(rows), le.transform(rows[TARGET].str.strip().to_numpy())
+    train_index, test_index = train_test_split(np.arange(len(y)), test_size=test_size, stratify=y, random_state=seed)
+    X_train, y_train = X[train_index], y[train_index]
+
+    params, cv_score = search_params(X_train, y_train, cv_folds, seed, n_jobs) if search else ({}, None)
+    # The held-out rows never reach the served model; they travel with it so every later load is checked on them
+    model = train(X_train, y_train, params, seed, n_jobs)
+    holdout_accuracy = float(np.mean(model.predict(X[test_index]) == y[test_index]))
+
+    trained_at = datetime.now(timezone.utc)
+    return {
+        "model": model,
+        "label_encoder": le,
+        "feature_names": FEATURE_NAMES,
+        "validation_csv": rows.iloc[np.sort(test_index)].to_csv(index=False),
+        "metadata": {
+            "version": trained_at.strftime("%Y%m%dT%H%M%SZ"),
+            "trained_at": trained_at.isoformat(),
+            "data_path": data_path,
+            "data_sha256": file_sha256(data_path),
+            "rows": int(len(y_train)),
+            "validation_rows": int(len(test_index)),
+            "class_counts": {str(name): int(count) for name, count in zip(le.classes_, np.bincount(y_train, minlength=len(le.classes_)))},
+            "params": params,
+            "seed": seed,
+            "cv_folds": cv_folds if search else None,
+            "cv_accuracy": cv_score,
+            "holdout_accuracy": holdout_accuracy,
+            "sklearn_version": sklearn.__version__,
+            # Byte offset consumed per data file; incremental updates resume from here
+            "checkpoints": {os.path.abspath(data_path): end_offset},
+        },
+    }
+
+
+def grow_forest(model, X, y, trees, max_trees=None):
+    # Warm start fits only the added trees, on the new rows alone
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    if max_trees and len(model.estimators_) > max_trees:
+        # Drop the oldest trees so prediction cost stays bounded
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.set_params(n_estimators=max_trees)
+    return model
+
+
+def update_incremental(model_path, data_path, trees, max_trees=None, from_start=False):
+    # Returns the updated bundle, a message, and the consumed rows (X, y); the rows are None when nothing
+    # was trained on, and the bundle is None when nothing changed at all
+    import sklearn
+
+    bundle = load_bundle(model_path)
+    metadata = bundle["metadata"]
+    checkpoints = metadata.setdefault("checkpoints", {})
+    data_key = os.path.abspath(data_path)
+
+    if data_key not in checkpoints and not from_start:
+        # Unknown file: assume the model already covers what is there and start tracking from its end
+        _, checkpoints[data_key] = read_rows(data_path, os.path.getsize(data_path))
+        return bundle, f"Started tracking {data_path} at byte {checkpoints[data_key]}; no rows consumed", None
+
+    X, y, le, end_offset = load_dataset(data_path, checkpoints.get(data_key, 0))
+    if len(y) == 0:
+        return None, "No new rows since the last checkpoint", None
+    missing = sorted(set(range(len(le.classes_))) - set(y.tolist()))
+    if missing:
+        # New trees must see every class or the forest's class layout would change
+        return None, f"{len(y)} new rows lack {', '.join(le.classes_[missing])} examples; waiting for more data", None
+
+    grow_forest(bundle["model"], X, y, trees, max_trees)
+    updated_at = datetime.now(timezone.utc)
+    counts = metadata.get("class_counts", {})
+    for name, count in zip(le.classes_, np.bincount(y, minlength=len(le.classes_))):
+        counts[str(name)] = counts.get(str(name), 0) + int(count)
+    checkpoints[data_key] = end_offset
+    metadata.update(
+        version=updated_at.strftime("%Y%m%dT%H%M%SZ"),
+        updated_at=updated_at.isoformat(),
+        rows=metadata.get("rows", 0) + int(len(y)),
+        class_counts=counts,
+        incremental_updates=metadata.get("incremental_updates", 0) + 1,
+        last_update_rows=int(len(y)),
+        last_update_trees=trees,
+        n_trees=len(bundle["model"].estimators_),
+        sklearn_version=sklearn.__version__,
+    )
+    return bundle, f"Added {trees} trees from {len(y)} new rows ({len(bundle['model'].estimators_)} trees total)", (X, y)
+
+
+def save_validation(bundle, path):
+    # The rows held out of the final fit, which the model registry checks each loaded version against
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="") as f:
+        f.write(bundle["validation_csv"])
+    os.replace(tmp_path, path)
+
+
+def install(artifact_path, model_path, saves):
+    # Everything is computed before anything is written; then the derived files go first and the model file
+    # last, within milliseconds. The registry waits for the files to stop changing, so it sees the set whole.
+    for save, *args in saves:
+        save(*args)
+    tmp_path = f"{model_path}.tmp"
+    shutil.copyfile(artifact_path, tmp_path)
+    os.replace(tmp_path, model_path)
+
+
+def promote(artifact_path, model_path=MODEL_PATH, delta=None):
+    # Install a new model and regenerate the derived artifacts that exist, so none of them go stale.
+    # After an incremental update, `delta` holds the rows it consumed (X, y), and the refresh costs in
+    # proportion to the update rather than the whole file: the calibration map is kept, attributions walk
+    # only the added and dropped trees, and the drift baseline gains the delta's counts.
+    import attributions
+    import calibration
+    import drift
+    import flat_forest
+    import prediction_table
+    from model_registry import VALIDATION_PATH
+
+    bundle = load_bundle(artifact_path)
+    model = bundle["model"]
+    saves = []
+    if "validation_csv" in bundle:
+        saves.append((save_validation, bundle, VALIDATION_PATH))
+    calibrator = None
+    if os.path.exists(calibration.CALIBRATION_PATH) and delta is not None:
+        calibrator = calibration.load_calibrator()
+    elif os.path.exists(calibration.CALIBRATION_PATH):
+        # Refit first: the table stores scores calibrated for this model
+        calibrator = calibration.fit_for_model(model, DATA_PATH)
+        saves.append((calibration.save_calibrator, calibrator))
+    if os.path.exists(prediction_table.TABLE_PATH):
+        saves.append((prediction_table.save_table, prediction_table.build_table(model, calibrator, calibration.column_severity(model, bundle["label_encoder"]))))
+    if os.path.exists(flat_forest.FOREST_PATH):
+        saves.append((flat_forest.save_forest, flat_forest.flatten_forest(model, bundle["label_encoder"].classes_, file_sha256(artifact_path))))
+    if os.path.exists(attributions.ATTRIBUTIONS_PATH) and delta is not None:
+        # The forest being replaced is still installed at this point
+        previous = load_bundle(model_path)["model"]
+        added = bundle["metadata"]["last_update_trees"]
+        dropped = len(previous.estimators_) + added - len(model.estimators_)
+        saves.append((attributions.save_attributions, attributions.update_attributions(attributions.load_attributions(), previous, model, added, dropped)))
+    elif os.path.exists(attributions.ATTRIBUTIONS_PATH):
+        saves.append((attributions.save_attributions, attributions.build_attributions(model)))
+    if os.path.exists(drift.BASELINE_PATH) and delta is not None:
+        saves.append((drift.save_baseline, drift.extend_baseline(drift.load_baseline(), *delta)))
+    elif os.path.exists(drift.BASELINE_PATH):
+        saves.append((drift.save_baseline, drift.build_baseline(DATA_PATH)))
+    install(artifact_path, model_path, saves)
+
+
+def promote_tenant(artifact_path, tenant):
+    # An institution's model lives in its own directory with the rows held out of its training, which
+    # validate each version the app and API load for that tenant. Derived artifacts are not built for tenants.
+    from model_registry import VALIDATION_PATH
+    from tenants import TENANT_NAME, TENANTS_DIR
+
+    if not TENANT_NAME.fullmatch(tenant):
+        raise ValueError(f"Invalid tenant name {tenant!r}")
+    tenant_dir = os.path.join(TENANTS_DIR, tenant)
+    os.makedirs(tenant_dir, exist_ok=True)
+    model_path = os.path.join(tenant_dir, MODEL_PATH)
+    bundle = load_bundle(artifact_path)
+    saves = [(save_validation, bundle, os.path.join(tenant_dir, VALIDATION_PATH))] if "validation_csv" in bundle else []
+    install(artifact_path, model_path, saves)
+    return model_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the stress model from the survey CSV and write a versioned artifact.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output-dir", default=MODELS_DIR)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cv-folds", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel workers for the search and the final fit (-1 = all cores)")
+    parser.add_argument("--no-search", action="store_true", help="Skip the hyperparameter search and use forest defaults")
+    parser.add_argument("--promote", action="store_true", help=f"Also install the artifact as {MODEL_PATH}")
+    parser.add_argument("--incremental", action="store_true", help=f"Update {MODEL_PATH} with rows appended to --data since the last checkpoint")
+    parser.add_argument("--trees-per-update", type=int, default=10)
+    parser.add_argument("--max-trees", type=int, help="Keep at most this many of the newest trees")
+    parser.add_argument("--from-start", action="store_true", help="With --incremental, consume an untracked file from its first row")
+    parser.add_argument("--tenant", help="Train an institution's own model; with --promote, install it under tenants/<name>/")
+    args = parser.parse_args()
+    if args.tenant and args.incremental:
+        parser.error("--incremental updates the default model only")
+    if args.tenant and args.output_dir == MODELS_DIR:
+        from tenants import TENANTS_DIR
+
+        args.output_dir = os.path.join(TENANTS_DIR, args.tenant, MODELS_DIR)
+
+    if args.incremental:
+        bundle, message, delta = update_incremental(MODEL_PATH, args.data, args.trees_per_update, args.max_trees, args.from_start)
+        print(message)
+        if bundle is not None and delta is None:
+            # Only the checkpoint moved: record it in place, with nothing to retrain or regenerate
+            save_bundle(bundle, MODEL_PATH)
+        elif bundle is not None:
+            os.makedirs(args.output_dir, exist_ok=True)
+            artifact_path = os.path.join(args.output_dir, f"student_stress_model-{bundle['metadata']['version']}.pkl")
+            save_bundle(bundle, artifact_path)
+            # The running app notices the new file and switches to it on its next prediction
+            promote(artifact_path, delta=delta)
+            print(f"Wrote {artifact_path} and promoted it to {MODEL_PATH}")
+        return
+
+    bundle = build_bundle(args.data, args.seed, args.cv_folds, n_jobs=args.n_jobs, search=not args.no_search)
+    metadata = bundle["metadata"]
+    os.makedirs(args.output_dir, exist_ok=True)
+    artifact_path = os.path.join(args.output_dir, f"student_stress_model-{metadata['version']}.pkl")
+    save_bundle(bundle, artifact_path)
+
+    print(f"Wrote {artifact_path}")
+    print(f"  params: {metadata['params']}")
+    if metadata["cv_accuracy"] is not None:
+        print(f"  cv accuracy: {metadata['cv_accuracy']:.3f}")
+    print(f"  holdout accuracy: {metadata['holdout_accuracy']:.3f}")
+
+    if args.promote and args.tenant:
+        print(f"Promoted to {promote_tenant(artifact_path, args.tenant)}")
+    elif args.promote:
+        promote(artifact_path)
+        print(f"Promoted to {MODEL_PATH}")
+
+
+if __name__ == "__main__":
+    main()
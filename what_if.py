@@ -0,0 +1,106 @@
+from itertools import combinations
+
+import numpy as np
+
+import prediction_table
+from calibration import CLASS_SEVERITY, labels_and_scores
+from feature_schema import FEATURE_NAMES, INPUT_RANGES
+
+# Inputs a student can actually change; age is held fixed
+ADJUSTABLE = ("SleepHours", "StudyHours", "ScreenTime", "Exercise", "SocialSupport")
+FEATURE_LABELS = {
+    "SleepHours": "Sleep Hours",
+    "StudyHours": "Study Hours",
+    "ScreenTime": "Screen Time",
+    "Exercise": "Exercise",
+    "SocialSupport": "Social Support",
+}
+
+
+def feature_values(name):
+    _, low, high = INPUT_RANGES[FEATURE_NAMES.index(name)]
+    return np.arange(low, high + 1)
+
+
+def perturbations(features):
+    # Every single-feature and two-feature change to the adjustable inputs, as one (n, 6) batch
+    base = np.asarray(features, dtype=np.float64).reshape(1, -1)
+    blocks, changed = [], []
+    for name in ADJUSTABLE:
+        column = FEATURE_NAMES.index(name)
+        block = np.repeat(base, len(feature_values(name)), axis=0)
+        block[:, column] = feature_values(name)
+        blocks.append(block)
+        changed += [(name,)] * len(block)
+    for first, second in combinations(ADJUSTABLE, 2):
+        a, b = np.meshgrid(feature_values(first), feature_values(second), indexing="ij")
+        block = np.repeat(base, a.size, axis=0)
+        block[:, FEATURE_NAMES.index(first)] = a.ravel()
+        block[:, FEATURE_NAMES.index(second)] = b.ravel()
+        blocks.append(block)
+        changed += [(first, second)] * len(block)
+    return np.concatenate(blocks), changed
+
+
+def evaluate(model, table, X, calibrator=None, severity=CLASS_SEVERITY):
+    # Severity of the predicted level and the score per row. The precomputed table answers the whole batch
+    # with one gather (its labels are class codes, mapped back to probability columns); otherwise one predict_proba call
+    if table is not None:
+        labels, _, scores = prediction_table.lookup_batch(table, X)
+        return severity[np.searchsorted(model.classes_, labels)], scores
+    columns, scores = labels_and_scores(model.predict_proba(X), calibrator, severity)
+    return severity[columns], scores
+
+
+def analyze(model, table, features, calibrator=None, severity=CLASS_SEVERITY):
+    # The current inputs ride at row 0 of the same batch, so a whole analysis is one model call
+    features = np.asarray(features, dtype=np.float64)
+    X, changed = perturbations(features)
+    severities, scores = evaluate(model, table, np.concatenate([features.reshape(1, -1), X]), calibrator, severity)
+    return {
+        "features": features,
+        "X": X,
+        "changed": changed,
+        "severity": severities[1:],
+        "scores": scores[1:],
+        "base_severity": int(severities[0]),
+        "base_score": float(scores[0]),
+    }
+
+
+def nearest_lower_stress(result, limit=3):
+    # Smallest change per set of features that lowers the predicted level:
+    # fewest features first, then fewest units, then lowest score
+    lower = np.flatnonzero(result["severity"] < result["base_severity"])
+    if not lower.size:
+        return []
+    distance = np.abs(result["X"][lower] - result["features"]).sum(axis=1)
+    n_changed = np.array([len(result["changed"][i]) for i in lower])
+    order = np.lexsort((result["scores"][lower], distance, n_changed))
+
+    suggestions, seen = [], set()
+    for i in lower[order]:
+        changes = tuple(
+            (name, int(result["features"][FEATURE_NAMES.index(name)]), int(result["X"][i, FEATURE_NAMES.index(name)]))
+            for name in result["changed"][i]
+            if result["X"][i, FEATURE_NAMES.index(name)] != result["features"][FEATURE_NAMES.index(name)]
+        )
+        # Skip combinations that only add to a change already suggested
+        names = frozenset(name for name, _, _ in changes)
+        if not changes or any(previous <= names for previous in seen):
+            continue
+        seen.add(names)
+        suggestions.append({"changes": changes, "severity": int(result["severity"][i]), "score": float(result["scores"][i])})
+        if len(suggestions) == limit:
+            break
+    return suggestions
+
+
+def pair_grid(result, first, second):
+    # Scores over the first x second grid with every other input at the student's current value
+    index = [i for i, names in enumerate(result["changed"]) if names == (first, second)]
+    if not index:
+        index = [i for i, names in enumerate(result["changed"]) if names == (second, first)]
+        first, second = second, first
+    shape = (len(feature_values(first)), len(feature_values(second)))
+    return feature_values(first), feature_values(second), result["scores"][index].reshape(shape), first, second